@@ -1,3 +1,4 @@
 # pylint: disable=missing-module-docstring
 
 __version__ = '0.1.2'
+default_app_config = 'dataextractor.apps.DataExtractorConfig'
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"Extraction API for asyncio consumers and ASGI views."
+import asyncio
+import functools
+import weakref
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from asgiref.sync import sync_to_async
+from . import parallel
+from . import plan as plan_module
+
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_MAX_PENDING = 4
+
+# Bound of the extractions started by amerge_data_extractors, per event loop.
+_semaphores = weakref.WeakKeyDictionary()
+
+
+async def aload_extractors(queryset):
+    "Loads the data extractors of a queryset without blocking the event loop."
+    if hasattr(queryset, 'aiterator'):
+        return [extractor async for extractor in queryset]
+    return await sync_to_async(list)(queryset)
+
+
+async def _load_plan(queryset):
+    # The cached plan of the queryset, kept up to date by invalidation,
+    # rather than loading and compiling its rows on every call.
+    if hasattr(queryset, 'acompiled'):
+        return await queryset.acompiled()
+    return plan_module.compile_extractors(await aload_extractors(queryset))
+
+
+async def _iterate(records):
+    if hasattr(records, '__aiter__'):
+        async for record in records:
+            yield record
+    else:
+        for record in records:
+            yield record
+
+
+class AsyncExtractor(object):
+    """Runs extraction of a set of data extractors in an executor.
+
+    `data_extractors` may be a list or a compiled plan. `executor` defaults
+    to the event loop's default thread pool. With a `ProcessPoolExecutor`,
+    which needs the list, the extractor configuration is sent along with
+    each batch and compiled once per worker process. At most max_pending
+    batches run at a time; the other callers wait, and streams stop reading
+    their input until a batch completes.
+    """
+
+    def __init__(self, data_extractors, executor=None, batch_size=DEFAULT_BATCH_SIZE,
+                 max_pending=DEFAULT_MAX_PENDING):
+        if isinstance(data_extractors, plan_module.ExtractionPlan):
+            self.config = None
+            self.plan = data_extractors
+        else:
+            self.config = plan_module.serialize_extractors(data_extractors)
+            self.plan = plan_module.compile_extractors(plan_module.deserialize_extractors(self.config))
+        self.executor = executor
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self._semaphore = None
+
+    @classmethod
+    async def from_queryset(cls, queryset, **kwargs):
+        """Returns an AsyncExtractor for the extractors of a queryset, using
+        its cached plan unless the executor is a process pool."""
+        if isinstance(kwargs.get('executor'), ProcessPoolExecutor):
+            return cls(await aload_extractors(queryset), **kwargs)
+        return cls(await _load_plan(queryset), **kwargs)
+
+    def _batch_function(self, batch, columns=False):
+        if isinstance(self.executor, ProcessPoolExecutor):
+            if self.config is None:
+                raise ValueError("Process pools require data extractors, not a compiled plan.")
+            return functools.partial(parallel.extract_config_chunk, self.config, batch, columns)
+        return functools.partial(self.plan.extract_many, batch, columns=columns)
+
+    def _submit(self, batch, columns=False):
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self.executor, self._batch_function(batch, columns))
+
+    @property
+    def semaphore(self):
+        # Created lazily so it belongs to the running event loop.
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+        return self._semaphore
+
+    async def extract(self, data):
+        "Extracts an ordered dict from data."
+        rows = await self.extract_many([data])
+        return rows[0]
+
+    async def extract_many(self, records, columns=False):
+        "Same as `ExtractionPlan.extract_many`, run in the executor."
+        async with self.semaphore:
+            return await self._submit(list(records), columns)
+
+    async def extract_stream(self, records):
+        """Yields the data extracted from each record of an iterable or an
+        asynchronous iterable, in order, extracting them in batches."""
+        pending = deque()
+        batch = []
+        async for record in _iterate(records):
+            batch.append(record)
+            if len(batch) < self.batch_size:
+                continue
+            if len(pending) >= self.max_pending:
+                for row in await pending.popleft():
+                    yield row
+            pending.append(self._submit(batch))
+            batch = []
+        if batch:
+            pending.append(self._submit(batch))
+        while pending:
+            for row in await pending.popleft():
+                yield row
+
+
+async def amerge_data_extractors(data_extractors, data, executor=None):
+    """Asynchronous `DataExtractor.merge_data_extractors`. data_extractors
+    may be a list, a compiled plan or a queryset, which is loaded with the
+    async ORM. Like `AsyncExtractor`, at most DEFAULT_MAX_PENDING
+    extractions run at a time in each event loop."""
+    if hasattr(data_extractors, 'query'):
+        data_extractors = await _load_plan(data_extractors)
+    elif not isinstance(data_extractors, plan_module.ExtractionPlan):
+        data_extractors = plan_module.compile_extractors(data_extractors)
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(DEFAULT_MAX_PENDING)
+    async with semaphore:
+        return await loop.run_in_executor(executor, data_extractors.extract, data)
+
+
+async def aextract_stream(data_extractors, records, executor=None, batch_size=DEFAULT_BATCH_SIZE,
+                          max_pending=DEFAULT_MAX_PENDING):
+    """Yields the data extracted from each record of an iterable or an
+    asynchronous iterable. See `AsyncExtractor`."""
+    kwargs = dict(executor=executor, batch_size=batch_size, max_pending=max_pending)
+    if hasattr(data_extractors, 'query'):
+        extractor = await AsyncExtractor.from_queryset(data_extractors, **kwargs)
+    else:
+        extractor = AsyncExtractor(data_extractors, **kwargs)
+    async for row in extractor.extract_stream(records):
+        yield row
@@ -1,6 +1,35 @@
 # -*- coding: utf-8
 from django.apps import AppConfig
+from django.core.signals import setting_changed
+from django.db.models.signals import post_delete, post_save
+from .functions import reset_json_decoder
+from .managers import compiled_extractors
+
+
+def _reset_json_decoder(setting, **kwargs):
+    if setting == 'DATAEXTRACTOR_JSON_DECODER':
+        reset_json_decoder()
+
+
+def _reset_backend(setting, **kwargs):
+    if setting == 'DATAEXTRACTOR_BACKEND':
+        from .expressions import reset_backend
+        reset_backend()
+        # Cached plans hold evaluators of the previous backend.
+        compiled_extractors.clear()
+
+
+def _invalidate_compiled_extractors(sender, using=None, **kwargs):
+    from .models import DataExtractor
+    if issubclass(sender, DataExtractor):
+        compiled_extractors.invalidate(sender, using=using)
 
 
 class DataExtractorConfig(AppConfig):
     name = 'dataextractor'
+
+    def ready(self):
+        setting_changed.connect(_reset_json_decoder)
+        setting_changed.connect(_reset_backend)
+        post_save.connect(_invalidate_compiled_extractors)
+        post_delete.connect(_invalidate_compiled_extractors)
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""Reproducible throughput and latency benchmarks of the extraction API.
+
+Run them with `python runbenchmarks.py`, which prints the results as JSON.
+"""
+from __future__ import unicode_literals
+import json
+import platform
+import random
+import time
+import jmespath
+from . import __version__
+from .plan import compile_extractors
+
+
+DEFAULT_COUNTS = (10, 100, 1000)
+DEFAULT_SIZES = ('small', 'medium', 'large')
+DEFAULT_KINDS = ('plain', 'nested', 'functions')
+DEFAULT_TARGETS = ('get_value', 'get_data', 'merge_data_extractors', 'compiled_plan')
+
+# Number of top level keys and depth of the nested object of each payload size.
+PAYLOAD_SIZES = {
+    'small': (10, 2),
+    'medium': (100, 4),
+    'large': (1000, 8),
+}
+
+FUNCTION_EXPRESSIONS = (
+    "date_{i} | date(@, '%Y-%m-%d')",
+    "document_{i} | json(@) | value",
+    "number_{i} | format(@, '{{:08d}}')",
+    "if(flag_{i}, field_{i}, `null`)",
+)
+
+
+def make_payload(size, seed=0):
+    "Returns a synthetic payload of the given size."
+    rand = random.Random(seed)
+    keys, depth = PAYLOAD_SIZES[size]
+    payload = {}
+    for index in range(keys):
+        payload['field_%d' % index] = rand.choice(["text %d" % index, index, index * 0.5, None])
+        payload['number_%d' % index] = rand.randint(0, 10 ** 6)
+        payload['flag_%d' % index] = rand.random() < 0.5
+        payload['date_%d' % index] = "2020-%02d-%02d" % (rand.randint(1, 12), rand.randint(1, 28))
+        payload['document_%d' % index] = json.dumps({'value': index, 'items': list(range(5))})
+    nested = payload
+    for level in range(depth):
+        nested['level'] = {'index': level, 'items': [{'id': item} for item in range(3)]}
+        nested = nested['level']
+    return payload
+
+
+def make_extractors(model, kind, count, size):
+    "Returns count unsaved instances of model of the given kind."
+    keys, depth = PAYLOAD_SIZES[size]
+    extractors = []
+    for index in range(count):
+        key = index % keys
+        if kind == 'plain':
+            expression = 'field_%d' % key
+        elif kind == 'nested':
+            level = index % depth + 1
+            expression = '.'.join(['level'] * level) + '.items[%d].id' % (index % 3)
+        else:
+            expression = FUNCTION_EXPRESSIONS[index % len(FUNCTION_EXPRESSIONS)].format(i=key)
+        extractors.append(model(field_name='output_%d' % index, expression=expression))
+    return extractors
+
+
+def _percentile(values, percent):
+    index = min(int(round(percent / 100.0 * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+
+def measure(function, arguments, repeat=3):
+    """Calls function with each item of arguments repeat times and returns
+    the throughput and the latency percentiles of the calls."""
+    latencies = []
+    timer = time.perf_counter
+    started = timer()
+    for _ in range(repeat):
+        for argument in arguments:
+            start = timer()
+            function(*argument)
+            latencies.append(timer() - start)
+    elapsed = timer() - started
+    latencies.sort()
+    return {
+        'calls': len(latencies),
+        'calls_per_sec': len(latencies) / elapsed if elapsed else None,
+        'p50_us': _percentile(latencies, 50) * 1e6,
+        'p99_us': _percentile(latencies, 99) * 1e6,
+    }
+
+
+def run(model, records=100, repeat=3, counts=DEFAULT_COUNTS, sizes=DEFAULT_SIZES,
+        kinds=DEFAULT_KINDS, targets=DEFAULT_TARGETS):
+    """Runs the benchmarks and returns the results as a JSON serializable dict.
+
+    `model` is a concrete `DataExtractor` subclass used to build the unsaved
+    extractors. get_value and get_data are timed per extractor call, the
+    other targets per record.
+    """
+    results = []
+    for size in sizes:
+        payloads = [make_payload(size, seed) for seed in range(records)]
+        for kind in kinds:
+            for count in counts:
+                extractors = make_extractors(model, kind, count, size)
+                for target in targets:
+                    if target in ('get_value', 'get_data'):
+                        arguments = [(getattr(extractor, target), payload)
+                                     for payload in payloads for extractor in extractors]
+                        result = measure(lambda method, payload: method(payload), arguments, repeat)
+                    elif target == 'merge_data_extractors':
+                        merge = model.merge_data_extractors
+                        result = measure(merge, [(extractors, payload) for payload in payloads], repeat)
+                    else:
+                        plan = compile_extractors(extractors)
+                        result = measure(plan.extract, [(payload,) for payload in payloads], repeat)
+                    result['records_per_sec'] = (
+                        result['calls_per_sec'] / count if target in ('get_value', 'get_data')
+                        else result['calls_per_sec'])
+                    result.update({'target': target, 'kind': kind, 'extractors': count, 'payload': size})
+                    results.append(result)
+    return {
+        'version': __version__,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'jmespath': jmespath.__version__,
+        'records': records,
+        'repeat': repeat,
+        'results': results,
+    }
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""Bulk import and export of data extractor configurations as JSON, YAML or
+CSV.
+
+Imports validate and precompile every row before writing anything, then
+create and update the valid rows with `bulk_create` and `bulk_update` in a
+single transaction. Invalid rows are reported and skipped.
+"""
+from __future__ import unicode_literals
+import csv
+import io
+import json
+import os
+from collections import OrderedDict
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from . import expressions
+from .managers import compiled_extractors
+from .specs import FIELDS
+
+
+FORMATS = ('json', 'yaml', 'csv')
+EXPORT_FIELDS = ('id',) + FIELDS
+BOOLEAN_FIELDS = ('omit', 'omit_empty')
+_TRUE = ('1', 'true', 't', 'yes', 'y', 'on')
+_FALSE = ('', '0', 'false', 'f', 'no', 'n', 'off')
+
+
+class RowError(object):
+    "Errors of a row of an import, by field name."
+
+    def __init__(self, index, errors):
+        self.index = index
+        self.errors = errors
+
+    def as_dict(self):
+        return {'row': self.index, 'errors': self.errors}
+
+    def __str__(self):
+        return "Row %d: %s" % (self.index, "; ".join(
+            "%s: %s" % (field, " ".join(messages)) for field, messages in sorted(self.errors.items())))
+
+
+class ImportResult(object):
+    "Outcome of `import_extractors`."
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.errors = []
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'errors': [error.as_dict() for error in self.errors],
+        }
+
+
+def guess_format(path, default='json'):
+    "Returns the format of a file from its extension."
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension == 'yml':
+        return 'yaml'
+    return extension if extension in FORMATS else default
+
+
+def _yaml():
+    try:
+        import yaml
+    except ImportError:
+        raise ValueError("The yaml format requires PyYAML.")
+    return yaml
+
+
+def read_rows(fp, file_format='json'):
+    "Returns the rows of a configuration file as a list of dicts."
+    if file_format == 'json':
+        rows = json.load(fp)
+    elif file_format == 'yaml':
+        yaml = _yaml()
+        try:
+            rows = yaml.safe_load(fp)
+        except yaml.YAMLError as error:
+            raise ValueError(str(error))
+    elif file_format == 'csv':
+        try:
+            rows = list(csv.DictReader(fp))
+        except csv.Error as error:
+            raise ValueError(str(error))
+    else:
+        raise ValueError("Unknown format '%s'." % file_format)
+    if rows is None:
+        return []
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise ValueError("Expected a list of objects.")
+    return rows
+
+
+def write_rows(fp, rows, file_format='json'):
+    "Writes rows of extractor fields to a file."
+    rows = list(rows)
+    if file_format == 'json':
+        json.dump(rows, fp, indent=2)
+        fp.write('\n')
+    elif file_format == 'yaml':
+        _yaml().safe_dump([dict(row) for row in rows], fp, default_flow_style=False, sort_keys=False)
+    elif file_format == 'csv':
+        writer = csv.DictWriter(fp, EXPORT_FIELDS, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        raise ValueError("Unknown format '%s'." % file_format)
+
+
+def export_rows(queryset):
+    "Returns the fields of the extractors of a queryset as ordered dicts."
+    return [OrderedDict(zip(EXPORT_FIELDS, values))
+            for values in queryset.order_by('pk').values_list(*EXPORT_FIELDS)]
+
+
+def export_extractors(queryset, file_format='json'):
+    "Returns the extractors of a queryset as a document of the given format."
+    output = io.StringIO()
+    write_rows(output, export_rows(queryset), file_format)
+    return output.getvalue()
+
+
+def _to_boolean(value):
+    if isinstance(value, bool) or value is None:
+        return bool(value)
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValidationError("'%s' is not a boolean." % value)
+
+
+def _to_pk(value):
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValidationError("'%s' is not a valid id." % value)
+
+
+def clean_row(model, row, instance=None):
+    """Returns an unsaved instance of model with the fields of a row, or
+    `instance` with the fields the row gives, after validating its fields,
+    compiling its expression and coercing its constant value. Raises ValidationError with the errors by
+    field name."""
+    errors = {}
+    values = {}
+    for name in ('id',) + BOOLEAN_FIELDS:
+        if row.get(name) is None:
+            continue
+        try:
+            values[name] = _to_pk(row[name]) if name == 'id' else _to_boolean(row[name])
+        except ValidationError as error:
+            errors[name] = error.messages
+    for name in ('field_name', 'value', 'expression', 'output_type'):
+        if row.get(name) is not None:
+            values[name] = str(row[name])
+    if instance is None:
+        instance = model(**values)
+    else:
+        # Fields missing from the row keep their stored value.
+        for name, value in values.items():
+            setattr(instance, name, value)
+    try:
+        instance.clean_fields(exclude=list(errors))
+    except ValidationError as error:
+        errors.update(error.message_dict)
+    if 'expression' not in errors and 'output_type' not in errors:
+        try:
+            # Compiles the expression and coerces the constant value.
+            instance.clean()
+        except ValidationError as error:
+            errors.update(error.message_dict)
+        else:
+            if instance.expression:
+                expressions.compile_evaluator(instance.expression)
+    if errors:
+        raise ValidationError(errors)
+    return instance
+
+
+def import_extractors(model, rows):
+    """Creates or updates the extractors of model described by rows.
+
+    Rows with an id update the fields they give of that extractor, the
+    others create new ones. All the rows are validated first; the valid ones are written in a single
+    transaction and the errors of the others are returned in the result.
+    """
+    result = ImportResult()
+    pks = {}
+    for index, row in enumerate(rows):
+        try:
+            pks[index] = _to_pk(row.get('id'))
+        except ValidationError:
+            # Reported by clean_row.
+            pass
+
+    using = model._default_manager.db
+    with transaction.atomic(using=using):
+        existing = model._default_manager.in_bulk([pk for pk in pks.values() if pk is not None])
+        to_create = []
+        to_update = []
+        for index, row in enumerate(rows):
+            pk = pks.get(index)
+            if pk is not None and pk not in existing:
+                result.errors.append(RowError(index, {'id': ["Extractor %s does not exist." % pk]}))
+                continue
+            try:
+                instance = clean_row(model, row, existing.get(pk))
+            except ValidationError as error:
+                result.errors.append(RowError(index, error.message_dict))
+                continue
+            (to_create if pk is None else to_update).append(instance)
+        if to_create:
+            model._default_manager.bulk_create(to_create)
+        if to_update:
+            model._default_manager.bulk_update(to_update, FIELDS + ('compiled_expression',))
+        if to_create or to_update:
+            # Deferred until the transaction commits, so other processes
+            # cannot cache the previous rows under the new version stamp.
+            compiled_extractors.invalidate(model, using=using)
+    result.created = len(to_create)
+    result.updated = len(to_update)
+    result.errors.sort(key=lambda error: error.index)
+    return result
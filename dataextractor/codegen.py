@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+"""Compilation of jmespath ASTs into Python closures.
+
+`compile_node` turns an AST into a function of the current value that
+behaves like `TreeInterpreter.visit` on the same node, without dispatching
+on the node type for every record. Function calls resolve their entry of
+the function table once and keep the argument type checks of jmespath.
+"""
+from __future__ import unicode_literals
+from jmespath.visitor import TreeInterpreter, _equals, _is_actual_number, _is_comparable
+
+
+_COMPARATORS = TreeInterpreter.COMPARATOR_FUNC
+
+
+def _is_false(value):
+    # Same as TreeInterpreter._is_false: jmespath falsy values differ from
+    # Python's (0 is true).
+    return value == '' or value == [] or value == {} or value is None or value is False
+
+
+class _Expression(object):
+    """Expression reference passed to functions such as sort_by. Named like
+    the interpreter's so the function signatures accept it."""
+
+    def __init__(self, expression, function):
+        self.expression = expression
+        self.function = function
+
+    def visit(self, node, value):
+        return self.function(value)
+
+
+def _chain(functions):
+    if len(functions) == 1:
+        return functions[0]
+    if len(functions) == 2:
+        first, second = functions
+        return lambda value: second(first(value))
+
+    def chain(value):
+        for function in functions:
+            value = function(value)
+        return value
+    return chain
+
+
+def _compile_field(node, custom_functions, dict_cls):
+    key = node['value']
+
+    def field(value):
+        try:
+            return value.get(key)
+        except AttributeError:
+            return None
+    return field
+
+
+def _compile_chain(node, custom_functions, dict_cls):
+    return _chain([compile_node(child, custom_functions, dict_cls) for child in node['children']])
+
+
+def _compile_comparator(node, custom_functions, dict_cls):
+    left, right = [compile_node(child, custom_functions, dict_cls) for child in node['children']]
+    name = node['value']
+    if name == 'eq':
+        return lambda value: _equals(left(value), right(value))
+    if name == 'ne':
+        return lambda value: not _equals(left(value), right(value))
+    compare = _COMPARATORS[name]
+
+    def comparator(value):
+        left_value = left(value)
+        right_value = right(value)
+        if not (_is_comparable(left_value) and _is_comparable(right_value)):
+            return None
+        return compare(left_value, right_value)
+    return comparator
+
+
+def _compile_identity(node, custom_functions, dict_cls):
+    return lambda value: value
+
+
+def _compile_expref(node, custom_functions, dict_cls):
+    expression = _Expression(node['children'][0],
+                             compile_node(node['children'][0], custom_functions, dict_cls))
+    return lambda value: expression
+
+
+def _valid_arity(signature, count):
+    if signature and signature[-1].get('variadic'):
+        return count >= len(signature)
+    return count == len(signature)
+
+
+def _compile_function(node, custom_functions, dict_cls):
+    name = node['value']
+    arguments = [compile_node(child, custom_functions, dict_cls) for child in node['children']]
+    get_lazy_function = getattr(custom_functions, 'get_lazy_function', None)
+    lazy = get_lazy_function(name, len(arguments)) if get_lazy_function is not None else None
+    if lazy is not None:
+        return lambda value: lazy(arguments, value)
+    spec = custom_functions.FUNCTION_TABLE.get(name)
+    if spec is None or not _valid_arity(spec['signature'], len(arguments)):
+        # Invalid calls fail when evaluated, like in the interpreter.
+        return lambda value: custom_functions.call_function(
+            name, [argument(value) for argument in arguments])
+    function = spec['function']
+    signature = spec['signature']
+    type_check = custom_functions._type_check
+
+    def call(value):
+        resolved = [argument(value) for argument in arguments]
+        type_check(resolved, signature, name)
+        return function(custom_functions, *resolved)
+    return call
+
+
+def _compile_filter_projection(node, custom_functions, dict_cls):
+    base, project, condition = [compile_node(child, custom_functions, dict_cls)
+                                for child in node['children']]
+
+    def filter_projection(value):
+        elements = base(value)
+        if not isinstance(elements, list):
+            return None
+        collected = []
+        for element in elements:
+            if not _is_false(condition(element)):
+                current = project(element)
+                if current is not None:
+                    collected.append(current)
+        return collected
+    return filter_projection
+
+
+def _compile_flatten(node, custom_functions, dict_cls):
+    base = compile_node(node['children'][0], custom_functions, dict_cls)
+
+    def flatten(value):
+        elements = base(value)
+        if not isinstance(elements, list):
+            return None
+        merged = []
+        for element in elements:
+            if isinstance(element, list):
+                merged.extend(element)
+            else:
+                merged.append(element)
+        return merged
+    return flatten
+
+
+def _compile_index(node, custom_functions, dict_cls):
+    index = node['value']
+
+    def get_index(value):
+        if not isinstance(value, list):
+            return None
+        try:
+            return value[index]
+        except IndexError:
+            return None
+    return get_index
+
+
+def _compile_slice(node, custom_functions, dict_cls):
+    selection = slice(*node['children'])
+
+    def get_slice(value):
+        if not isinstance(value, list):
+            return None
+        return value[selection]
+    return get_slice
+
+
+def _compile_key_val_pair(node, custom_functions, dict_cls):
+    return compile_node(node['children'][0], custom_functions, dict_cls)
+
+
+def _compile_literal(node, custom_functions, dict_cls):
+    literal = node['value']
+    return lambda value: literal
+
+
+def _compile_multi_select_dict(node, custom_functions, dict_cls):
+    pairs = [(child['value'], compile_node(child, custom_functions, dict_cls))
+             for child in node['children']]
+
+    def multi_select_dict(value):
+        if value is None:
+            return None
+        collected = dict_cls()
+        for key, function in pairs:
+            collected[key] = function(value)
+        return collected
+    return multi_select_dict
+
+
+def _compile_multi_select_list(node, custom_functions, dict_cls):
+    functions = [compile_node(child, custom_functions, dict_cls) for child in node['children']]
+
+    def multi_select_list(value):
+        if value is None:
+            return None
+        return [function(value) for function in functions]
+    return multi_select_list
+
+
+def _compile_or(node, custom_functions, dict_cls):
+    left, right = [compile_node(child, custom_functions, dict_cls) for child in node['children']]
+
+    def or_expression(value):
+        matched = left(value)
+        if _is_false(matched):
+            matched = right(value)
+        return matched
+    return or_expression
+
+
+def _compile_and(node, custom_functions, dict_cls):
+    left, right = [compile_node(child, custom_functions, dict_cls) for child in node['children']]
+
+    def and_expression(value):
+        matched = left(value)
+        if _is_false(matched):
+            return matched
+        return right(value)
+    return and_expression
+
+
+def _compile_not(node, custom_functions, dict_cls):
+    operand = compile_node(node['children'][0], custom_functions, dict_cls)
+
+    def not_expression(value):
+        result = operand(value)
+        if _is_actual_number(result) and result == 0:
+            # !0 is false: 0 is not falsy in jmespath.
+            return False
+        return not result
+    return not_expression
+
+
+def _compile_projection(node, custom_functions, dict_cls):
+    base, project = [compile_node(child, custom_functions, dict_cls) for child in node['children']]
+
+    def projection(value):
+        elements = base(value)
+        if not isinstance(elements, list):
+            return None
+        collected = []
+        for element in elements:
+            current = project(element)
+            if current is not None:
+                collected.append(current)
+        return collected
+    return projection
+
+
+def _compile_value_projection(node, custom_functions, dict_cls):
+    base, project = [compile_node(child, custom_functions, dict_cls) for child in node['children']]
+
+    def value_projection(value):
+        elements = base(value)
+        try:
+            elements = elements.values()
+        except AttributeError:
+            return None
+        collected = []
+        for element in elements:
+            current = project(element)
+            if current is not None:
+                collected.append(current)
+        return collected
+    return value_projection
+
+
+_COMPILERS = {
+    'and_expression': _compile_and,
+    'comparator': _compile_comparator,
+    'current': _compile_identity,
+    'expref': _compile_expref,
+    'field': _compile_field,
+    'filter_projection': _compile_filter_projection,
+    'flatten': _compile_flatten,
+    'function_expression': _compile_function,
+    'identity': _compile_identity,
+    'index': _compile_index,
+    'index_expression': _compile_chain,
+    'key_val_pair': _compile_key_val_pair,
+    'literal': _compile_literal,
+    'multi_select_dict': _compile_multi_select_dict,
+    'multi_select_list': _compile_multi_select_list,
+    'not_expression': _compile_not,
+    'or_expression': _compile_or,
+    'pipe': _compile_chain,
+    'projection': _compile_projection,
+    'slice': _compile_slice,
+    'subexpression': _compile_chain,
+    'value_projection': _compile_value_projection,
+}
+
+
+def compile_node(node, custom_functions, dict_cls=dict):
+    """Returns a function of the current value evaluating an AST node with
+    the given `Functions` instance."""
+    try:
+        compiler = _COMPILERS[node['type']]
+    except KeyError:
+        raise ValueError("Unknown expression node type '%s'." % node['type'])
+    return compiler(node, custom_functions, dict_cls)
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""Coercion of extracted values to the output type declared by an extractor.
+
+Values that cannot be coerced become None and are counted in `errors`
+under the key of their extractor instead of raising.
+"""
+from __future__ import unicode_literals
+import datetime
+import decimal
+import json
+import threading
+
+
+OUTPUT_TYPES = ('int', 'float', 'decimal', 'bool', 'date', 'datetime', 'str', 'json')
+
+_TRUE = frozenset(['1', 'true', 't', 'yes', 'y', 'on'])
+_FALSE = frozenset(['', '0', 'false', 'f', 'no', 'n', 'off'])
+_DATETIME_FORMATS = ('%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d')
+_ERRORS = (TypeError, ValueError, ArithmeticError)
+
+
+class CoercionErrors(object):
+    "Number of values that could not be coerced, by extractor key."
+
+    def __init__(self):
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def add(self, key):
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def as_dict(self):
+        with self._lock:
+            return dict(self.counts)
+
+    def reset(self):
+        with self._lock:
+            self.counts.clear()
+
+
+errors = CoercionErrors()
+
+
+def _parse(value, date_format):
+    from .functions import parse_datetime
+    return parse_datetime(value, date_format)
+
+
+def to_int(value):
+    if isinstance(value, (bool, int)):
+        return int(value)
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError("%r is not an integer." % value)
+        return int(value)
+    if isinstance(value, decimal.Decimal):
+        if value != value.to_integral_value():
+            raise ValueError("%r is not an integer." % value)
+        return int(value)
+    if isinstance(value, str):
+        return int(value)
+    raise TypeError("Cannot convert %s to int." % type(value).__name__)
+
+
+def to_float(value):
+    if isinstance(value, (bool, int, float, decimal.Decimal, str)):
+        return float(value)
+    raise TypeError("Cannot convert %s to float." % type(value).__name__)
+
+
+def to_decimal(value):
+    if isinstance(value, float):
+        # Through repr to keep the shortest representation of the float.
+        return decimal.Decimal(repr(value))
+    if isinstance(value, (bool, int, decimal.Decimal)):
+        return decimal.Decimal(int(value) if isinstance(value, bool) else value)
+    if isinstance(value, str):
+        try:
+            return decimal.Decimal(value.strip())
+        except decimal.InvalidOperation:
+            raise ValueError("%r is not a decimal." % value)
+    raise TypeError("Cannot convert %s to decimal." % type(value).__name__)
+
+
+def to_bool(value):
+    if isinstance(value, (bool, int, float, decimal.Decimal)):
+        return bool(value)
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in _TRUE:
+            return True
+        if text in _FALSE:
+            return False
+        raise ValueError("%r is not a boolean." % value)
+    raise TypeError("Cannot convert %s to bool." % type(value).__name__)
+
+
+def to_date(value):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    if isinstance(value, str):
+        return _parse(value, '%Y-%m-%d').date()
+    raise TypeError("Cannot convert %s to date." % type(value).__name__)
+
+
+def to_datetime(value):
+    if isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, datetime.date):
+        return datetime.datetime(value.year, value.month, value.day)
+    if isinstance(value, str):
+        for date_format in _DATETIME_FORMATS:
+            try:
+                return _parse(value, date_format)
+            except ValueError:
+                pass
+        raise ValueError("%r is not a datetime." % value)
+    raise TypeError("Cannot convert %s to datetime." % type(value).__name__)
+
+
+def to_str(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (list, dict, bool)):
+        return json.dumps(value)
+    return str(value)
+
+
+def to_json(value):
+    "Decodes strings holding JSON, other values are returned as they are."
+    if isinstance(value, str):
+        from .functions import get_json_loads
+        return get_json_loads()(value)
+    return value
+
+
+COERCERS = {
+    'int': to_int,
+    'float': to_float,
+    'decimal': to_decimal,
+    'bool': to_bool,
+    'date': to_date,
+    'datetime': to_datetime,
+    'str': to_str,
+    'json': to_json,
+}
+
+
+def get_coercer(output_type):
+    "Returns the coercion function of an output type, None for no type."
+    if not output_type:
+        return None
+    try:
+        return COERCERS[output_type]
+    except KeyError:
+        raise ValueError("Unknown output type '%s'." % output_type)
+
+
+def coerce(coercer, value, key):
+    """Returns the coerced value, or None counting an error under key when
+    it cannot be coerced. None is returned as it is."""
+    if value is None:
+        return None
+    try:
+        return coercer(value)
+    except _ERRORS:
+        errors.add(key)
+        return None
+
+
+def coerce_constant(coercer, value, key):
+    """Coerces the constant value of an extractor. Constants that cannot be
+    coerced count an error and are kept as they are, so they are still
+    set."""
+    try:
+        return coercer(value)
+    except _ERRORS:
+        errors.add(key)
+        return value
+
+
+def coerce_getter(getter, coercer, key):
+    "Returns a getter coercing the values of another."
+    def get(data):
+        value = getter(data)
+        if value is None:
+            return None
+        try:
+            return coercer(value)
+        except _ERRORS:
+            errors.add(key)
+            return None
+    return get
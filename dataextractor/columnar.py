@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""Parquet and Feather output of streamed extractions, built on pyarrow.
+
+Extracted values are buffered per field and written as an Arrow record
+batch every `batch_size` rows, so memory stays bounded to one batch
+whatever the size of the input.
+"""
+from __future__ import unicode_literals
+from .streaming import DEFAULT_BATCH_SIZE, iter_batches
+
+
+FORMATS = ('parquet', 'feather')
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Parquet and Feather output require pyarrow.")
+    return pyarrow
+
+
+def _arrow_type(pa, output_type):
+    return {
+        'int': pa.int64,
+        'float': pa.float64,
+        'bool': pa.bool_,
+        'date': pa.date32,
+        'datetime': lambda: pa.timestamp('us'),
+        'str': pa.string,
+    }.get(output_type, lambda: None)()
+
+
+def output_schema(data_extractors):
+    """Returns a dict mapping to Arrow types the fields whose extractors
+    all declare the same output type (other than decimal or json)."""
+    pa = _pyarrow()
+    output_types = {}
+    for extractor in data_extractors:
+        if not extractor.omit:
+            output_types.setdefault(extractor.field_name, set()).add(
+                getattr(extractor, 'output_type', '') or '')
+    schema = {}
+    for name, types in output_types.items():
+        arrow_type = _arrow_type(pa, types.pop()) if len(types) == 1 else None
+        if arrow_type is not None:
+            schema[name] = arrow_type
+    return schema
+
+
+class ArrowWriter(object):
+    """Writes extracted rows or columns to a Parquet or Feather file.
+
+    `sink` is a path or a binary file object. `schema` may be a
+    `pyarrow.Schema` or a dict mapping some field names to Arrow types; the
+    types of the other fields are inferred from the first batch, where
+    fields without any value are written as strings. Values that do not
+    match the type of their field raise ValueError: declare the type of
+    fields whose values vary, such as integers followed by floats, or that
+    may have no value in the first batch.
+    """
+
+    def __init__(self, sink, fieldnames, file_format='parquet', batch_size=DEFAULT_BATCH_SIZE,
+                 schema=None, compression='snappy'):
+        if file_format not in FORMATS:
+            raise ValueError("Unknown format '%s'." % file_format)
+        self.pa = _pyarrow()
+        self.sink = sink
+        self.fieldnames = list(fieldnames)
+        self.file_format = file_format
+        self.batch_size = batch_size
+        self.compression = compression
+        self.count = 0
+        if isinstance(schema, self.pa.Schema):
+            self.fieldnames = schema.names
+            self.types = dict(zip(schema.names, schema.types))
+            self.schema = schema
+        else:
+            self.types = dict(schema or {})
+            self.schema = None
+        self._writer = None
+        self._columns = dict((name, []) for name in self.fieldnames)
+        self._pending = 0
+
+    def write(self, row):
+        "Buffers a row, writing a batch when batch_size rows are pending."
+        for name in self.fieldnames:
+            self._columns[name].append(row.get(name))
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.flush()
+
+    def write_columns(self, columns):
+        """Buffers an ordered dict of columns, as returned by
+        `ExtractionPlan.extract_many(columns=True)`."""
+        size = len(next(iter(columns.values()))) if columns else 0
+        for name in self.fieldnames:
+            values = columns.get(name)
+            self._columns[name].extend([None] * size if values is None else values)
+        self._pending += size
+        if self._pending >= self.batch_size:
+            self.flush()
+
+    def _infer_schema(self):
+        fields = []
+        for name in self.fieldnames:
+            arrow_type = self.types.get(name)
+            if arrow_type is None:
+                try:
+                    arrow_type = self.pa.array(self._columns[name]).type
+                except (self.pa.ArrowInvalid, self.pa.ArrowTypeError, TypeError) as error:
+                    raise ValueError("Values of field '%s' have mixed types: %s. Declare its type "
+                                     "in the schema." % (name, error))
+                if self.pa.types.is_null(arrow_type):
+                    # The field has no value in the first batch.
+                    arrow_type = self.pa.string()
+            fields.append(self.pa.field(name, arrow_type))
+        return self.pa.schema(fields)
+
+    def _open(self):
+        if self.file_format == 'parquet':
+            import pyarrow.parquet
+            return pyarrow.parquet.ParquetWriter(self.sink, self.schema, compression=self.compression)
+        return self.pa.ipc.new_file(self.sink, self.schema)
+
+    def _to_array(self, field):
+        values = self._columns[field.name]
+        try:
+            if field.name in self.types:
+                return self.pa.array(values, type=field.type)
+            # Inferred again rather than converted: pyarrow would truncate
+            # floats in integer fields and stringify numbers in string ones.
+            array = self.pa.array(values)
+        except (self.pa.ArrowInvalid, self.pa.ArrowTypeError, TypeError) as error:
+            raise ValueError("Values of field '%s' do not match type %s: %s. Declare its type in "
+                             "the schema." % (field.name, field.type, error))
+        if self.pa.types.is_null(array.type):
+            return array.cast(field.type)
+        if array.type != field.type:
+            raise ValueError("Values of field '%s' are %s, not %s. Declare its type in the "
+                             "schema." % (field.name, array.type, field.type))
+        return array
+
+    def flush(self):
+        """Writes the pending rows as a record batch. The first one fixes
+        the schema."""
+        if not self._pending:
+            return
+        if self.schema is None:
+            self.schema = self._infer_schema()
+        if self._writer is None:
+            self._writer = self._open()
+        batch = self.pa.RecordBatch.from_arrays(
+            [self._to_array(field) for field in self.schema], schema=self.schema)
+        self._writer.write_batch(batch)
+        self.count += self._pending
+        self._pending = 0
+        for values in self._columns.values():
+            del values[:]
+
+    def close(self):
+        "Writes the pending rows and closes the file."
+        self.flush()
+        if self._writer is None:
+            if self.schema is None:
+                self.schema = self._infer_schema()
+            self._writer = self._open()
+        self._writer.close()
+
+    def discard(self):
+        "Drops the pending rows and closes the file, after an error."
+        self._pending = 0
+        for values in self._columns.values():
+            del values[:]
+        if self._writer is not None:
+            self._writer.close()
+
+
+def write_columnar(data_extractors, records, sink, file_format='parquet',
+                   batch_size=DEFAULT_BATCH_SIZE, schema=None, compression='snappy'):
+    """Extracts the records of an iterable and writes them to a Parquet or
+    Feather file, one record batch of batch_size rows at a time. Returns
+    the number of rows written. Fields with a declared output type get the
+    matching Arrow type unless `schema` gives another one."""
+    from . import plan as plan_module
+    if not isinstance(data_extractors, plan_module.ExtractionPlan):
+        data_extractors = list(data_extractors)
+        if not isinstance(schema, _pyarrow().Schema):
+            schema = dict(output_schema(data_extractors), **(schema or {}))
+        data_extractors = plan_module.compile_extractors(data_extractors)
+    writer = ArrowWriter(sink, data_extractors.field_names, file_format=file_format,
+                         batch_size=batch_size, schema=schema, compression=compression)
+    try:
+        for batch in iter_batches(records, batch_size):
+            writer.write_columns(data_extractors.extract_many(batch, columns=True))
+    except Exception:
+        writer.discard()
+        raise
+    writer.close()
+    return writer.count
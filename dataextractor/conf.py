@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"Access to the DATAEXTRACTOR_* settings, usable without Django configured."
+from __future__ import unicode_literals
+
+
+def get_setting(name, default=None):
+    """Returns the value of a Django setting, or default when it is not
+    defined or Django settings are not configured."""
+    try:
+        from django.conf import settings
+        from django.core.exceptions import ImproperlyConfigured
+    except ImportError:
+        return default
+    try:
+        return getattr(settings, name, default)
+    except ImproperlyConfigured:
+        return default
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""Extraction engine, importable without Django.
+
+Works on any object with the attributes of a data extractor: model
+instances or `ExtractorSpec`. jmespath, the custom functions and the
+compiled plans are imported on first use, so importing this module is
+cheap for short-lived processes that never configure Django.
+"""
+from __future__ import unicode_literals
+from collections import OrderedDict
+from . import coercion
+from . import instrumentation
+
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Bound by _load on first use.
+_search = None
+_json_memo = None
+
+
+def _load():
+    "Imports the expression modules, which load jmespath."
+    global _search, _json_memo
+    from . import expressions, functions
+    _json_memo = functions.json_memo
+    _search = expressions.search
+
+
+def search(expression, data):
+    "Evaluates a jmespath expression with the custom functions against data."
+    if _search is None:
+        _load()
+    return _search(expression, data)
+
+
+def dump_compiled(expression):
+    """Validates an expression and returns its serialized compiled form, see
+    `expressions.dump_compiled`."""
+    from . import expressions
+    return expressions.dump_compiled(expression)
+
+
+def preload(expression, serialized):
+    "Caches the stored compiled form of an expression, see `expressions.preload`."
+    from . import expressions
+    return expressions.preload(expression, serialized)
+
+
+def _get_value(extractor, data):
+    if extractor.omit:
+        return None
+    output_type = getattr(extractor, 'output_type', None)
+    if extractor.value:
+        if output_type:
+            return coercion.coerce_constant(coercion.get_coercer(output_type), extractor.value,
+                                            instrumentation.extractor_key(extractor))
+        return extractor.value
+    if extractor.expression:
+        if _search is None:
+            _load()
+        value = _search(extractor.expression, data)
+    else:
+        value = data.get(extractor.field_name)
+    if output_type:
+        return coercion.coerce(coercion.get_coercer(output_type), value,
+                               instrumentation.extractor_key(extractor))
+    return value
+
+
+def get_value(extractor, data):
+    "Extracts the value of an extractor from a data dict."
+    if instrumentation.recorder is not None and not extractor.omit and not extractor.value:
+        return instrumentation.measure(
+            instrumentation.extractor_key(extractor), lambda data: _get_value(extractor, data), data)
+    return _get_value(extractor, data)
+
+
+def get_data(extractor, data):
+    "Extracts an ordered dict with the value of an extractor from a data dict."
+    if extractor.omit:
+        return OrderedDict()
+    value = extractor.get_value(data)
+    if extractor.omit_empty and value is None:
+        return OrderedDict()
+    return OrderedDict([[extractor.field_name, value]])
+
+
+def merge_data_extractors(data_extractors, data):
+    "Merges the data extracted by each extractor from a data dict."
+    if _json_memo is None:
+        _load()
+    result = OrderedDict()
+    with _json_memo():
+        for extractor in data_extractors:
+            extracted_data = extractor.get_data(data)
+            for key, value in extracted_data.items():
+                result[key] = value
+    return result
+
+
+def compile_extractors(data_extractors):
+    "Compiles data extractors into a reusable `ExtractionPlan`."
+    from . import plan
+    return plan.compile_extractors(data_extractors)
+
+
+def extract_many(data_extractors, records, columns=False, out=None, workers=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+    """Extracts data from many records, as a list of rows or as columns.
+    See `ExtractionPlan.extract_many`. With `workers` the records are
+    extracted in a pool of processes, see `ParallelExtractor`."""
+    from . import plan
+    if workers is not None:
+        from . import parallel
+        if isinstance(data_extractors, plan.ExtractionPlan):
+            raise ValueError("Compiled plans cannot be sent to worker processes.")
+        with parallel.ParallelExtractor(data_extractors, workers, chunk_size) as extractor:
+            result = extractor.extract_many(records, columns=columns)
+        if out is None:
+            return result
+        return plan.fill_output(out, result, columns)
+    if not isinstance(data_extractors, plan.ExtractionPlan):
+        data_extractors = plan.compile_extractors(data_extractors)
+    return data_extractors.extract_many(records, columns=columns, out=out)
+
+
+def extract_frame(data_extractors, records, dtypes=None, frame=True):
+    """Extracts many records into a pandas DataFrame, or a dict of NumPy
+    arrays. See `frames.extract_frame`."""
+    from . import frames
+    return frames.extract_frame(data_extractors, records, dtypes=dtypes, frame=frame)
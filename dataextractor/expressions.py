@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+"Compiled jmespath expressions shared by every extractor in the process."
+from __future__ import unicode_literals
+import functools
+import json
+import threading
+from collections import OrderedDict
+import jmespath
+from jmespath import exceptions, visitor
+from jmespath.parser import ParsedResult
+from . import codegen
+from .conf import get_setting
+from .functions import Functions
+
+
+DEFAULT_CACHE_SIZE = 1024
+BACKENDS = ('interpreter', 'closures')
+
+# Name of the selected backend, set by get_backend.
+_backend = None
+
+
+class ExpressionCache(object):
+    "Bounded LRU cache of compiled jmespath expressions keyed by expression text."
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE, compile=jmespath.compile):
+        self.maxsize = maxsize
+        self.compile = compile
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, expression):
+        return expression in self._entries
+
+    def get(self, expression):
+        "Returns the compiled expression, parsing it on a cache miss."
+        with self._lock:
+            try:
+                compiled = self._entries[expression]
+            except KeyError:
+                pass
+            else:
+                self._entries.move_to_end(expression)
+                self.hits += 1
+                return compiled
+        # Parse outside the lock; a concurrent miss on the same text only
+        # costs a duplicate parse.
+        compiled = self.compile(expression)
+        with self._lock:
+            self.misses += 1
+        self.put(expression, compiled)
+        return compiled
+
+    def put(self, expression, compiled):
+        "Stores the compiled form of an expression obtained elsewhere."
+        with self._lock:
+            self._entries[expression] = compiled
+            self._entries.move_to_end(expression)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        "Removes all the compiled expressions and resets the counters."
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        "Returns a dict with the cache counters."
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+        }
+
+
+def get_field(value, name):
+    "Looks up a key the way jmespath does: None when value is not a dict."
+    try:
+        return value.get(name)
+    except AttributeError:
+        return None
+
+
+def get_index(value, index):
+    "Looks up a list item the way jmespath does: None when out of range."
+    if not isinstance(value, list):
+        return None
+    try:
+        return value[index]
+    except IndexError:
+        return None
+
+
+def _collect_path(node, steps):
+    node_type = node['type']
+    if node_type == 'field':
+        steps.append((get_field, node['value']))
+    elif node_type == 'index':
+        steps.append((get_index, node['value']))
+    elif node_type in ('subexpression', 'index_expression'):
+        for child in node['children']:
+            if not _collect_path(child, steps):
+                return False
+    elif node_type not in ('identity', 'current'):
+        return False
+    return True
+
+
+def path_steps(parsed):
+    """Returns the steps of an AST made only of field, subexpression and
+    index nodes as a tuple of (lookup, key) pairs, or None for any other
+    AST."""
+    steps = []
+    if not _collect_path(parsed, steps):
+        return None
+    return tuple(steps)
+
+
+def function_names(parsed):
+    "Returns the set of the functions called by an AST."
+    names = set()
+    pending = [parsed]
+    while pending:
+        node = pending.pop()
+        if node['type'] == 'function_expression':
+            names.add(node['value'])
+        pending.extend(child for child in node.get('children', ()) if isinstance(child, dict))
+    return names
+
+
+def make_accessor(steps):
+    "Returns a callable following path steps with jmespath semantics."
+    if not steps:
+        return lambda data: data
+    if len(steps) == 1:
+        lookup, key = steps[0]
+        if lookup is get_field:
+            def accessor(data):
+                if type(data) is dict:
+                    return data.get(key)
+                return get_field(data, key)
+        else:
+            accessor = lambda data: get_index(data, key)
+    else:
+        def accessor(data):
+            for lookup, key in steps:
+                if type(data) is dict and lookup is get_field:
+                    data = data.get(key)
+                else:
+                    data = lookup(data, key)
+                if data is None:
+                    return None
+            return data
+    accessor.path = steps
+    return accessor
+
+
+def pipe_nodes(parsed):
+    "Returns the list of the expressions chained by pipes in an AST."
+    if parsed['type'] != 'pipe':
+        return [parsed]
+    left, right = parsed['children']
+    return pipe_nodes(left) + [right]
+
+
+def _compile_evaluator(expression, backend=None):
+    parsed = expression_cache.get(expression).parsed
+    steps = path_steps(parsed)
+    if steps is not None:
+        return make_accessor(steps)
+    nodes = pipe_nodes(parsed)
+    steps = path_steps(nodes[0]) if len(nodes) > 1 else None
+    if steps:
+        # A plain path piped into other expressions: only the rest of the
+        # pipe goes through the backend.
+        accessor = make_accessor(steps)
+        rest = tuple(nodes[1:])
+        evaluator = make_pipe_evaluator(accessor, rest, backend)
+        evaluator.prefix = steps
+        evaluator.rest = rest
+        return evaluator
+    return node_evaluator(parsed, backend)
+
+
+def node_evaluator(node, backend=None):
+    """Returns a function of the current value evaluating an AST node with
+    the given backend, by default the one selected by the settings."""
+    if (backend or get_backend()) == 'closures':
+        return codegen.compile_node(node, options.custom_functions)
+    visit = interpreter.visit
+    return lambda value: visit(node, value)
+
+
+def make_pipe_evaluator(accessor, rest, backend=None):
+    "Returns a callable piping the result of accessor through AST nodes."
+    functions = [node_evaluator(node, backend) for node in rest]
+    if len(functions) == 1:
+        function = functions[0]
+        return lambda data: function(accessor(data))
+
+    def evaluator(data):
+        value = accessor(data)
+        for function in functions:
+            value = function(value)
+        return value
+    return evaluator
+
+
+def get_backend():
+    """Returns the name of the backend evaluating expressions that are not
+    plain paths, selected with the DATAEXTRACTOR_BACKEND setting:
+    'interpreter' (the default, jmespath's TreeInterpreter) or 'closures'
+    (ASTs compiled into Python closures by `codegen`)."""
+    global _backend
+    if _backend is None:
+        name = get_setting('DATAEXTRACTOR_BACKEND', 'interpreter')
+        if name not in BACKENDS:
+            raise ValueError("Unknown expression backend '%s'." % name)
+        _backend = name
+    return _backend
+
+
+def reset_backend():
+    "Forgets the selected backend and the evaluators compiled with it."
+    global _backend
+    _backend = None
+    evaluator_cache.clear()
+
+
+expression_cache = ExpressionCache()
+evaluator_cache = ExpressionCache(compile=_compile_evaluator)
+
+
+class Interpreter(visitor.TreeInterpreter):
+    "TreeInterpreter evaluating the arguments of lazy functions on demand."
+
+    def visit_function_expression(self, node, value):
+        children = node['children']
+        lazy = self._functions.get_lazy_function(node['value'], len(children))
+        if lazy is None:
+            return super(Interpreter, self).visit_function_expression(node, value)
+        visit = self.visit
+        return lazy([functools.partial(visit, child) for child in children], value)
+
+
+options = jmespath.Options(custom_functions=Functions())
+# The interpreter keeps no state between visits, so it is shared.
+interpreter = Interpreter(options)
+
+
+def compile_expression(expression):
+    "Returns the compiled form of an expression from the process-wide cache."
+    return expression_cache.get(expression)
+
+
+def compile_evaluator(expression, backend=None):
+    """Returns a callable evaluating an expression against data. Plain paths
+    get a direct accessor, other expressions use the backend. Evaluators of
+    the selected backend are cached, those of another one are not."""
+    if backend is not None and backend != get_backend():
+        return _compile_evaluator(expression, backend)
+    return evaluator_cache.get(expression)
+
+
+def search(expression, data):
+    "Evaluates an expression against data using the shared options."
+    return evaluator_cache.get(expression)(data)
+
+
+def check_functions(parsed):
+    """Checks that the functions called by an AST exist and get the number
+    of arguments of their signature. Raises UnknownFunctionError or
+    ArityError like the interpreter would on evaluation."""
+    table = options.custom_functions.FUNCTION_TABLE
+    pending = [parsed]
+    while pending:
+        node = pending.pop()
+        children = node.get('children', ())
+        if node['type'] == 'function_expression':
+            name = node['value']
+            if name not in table:
+                raise exceptions.UnknownFunctionError("Unknown function: %s()" % name)
+            signature = table[name]['signature']
+            if signature and signature[-1].get('variadic'):
+                if len(children) < len(signature):
+                    raise exceptions.VariadictArityError(len(signature), len(children), name)
+            elif len(children) != len(signature):
+                raise exceptions.ArityError(len(signature), len(children), name)
+        pending.extend(child for child in children if isinstance(child, dict))
+
+
+def validate_expression(expression):
+    """Returns the compiled form of an expression after checking its
+    function calls. Raises a JMESPathError when the expression is invalid."""
+    compiled = compile_expression(expression)
+    check_functions(compiled.parsed)
+    return compiled
+
+
+def dump_compiled(expression):
+    """Validates an expression and returns its AST serialized as JSON, to be
+    stored along with it and passed to `preload`."""
+    compiled = validate_expression(expression)
+    return json.dumps({
+        'expression': expression,
+        'jmespath': jmespath.__version__,
+        'ast': compiled.parsed,
+    }, separators=(',', ':'))
+
+
+def preload(expression, serialized):
+    """Caches the compiled form of an expression from the output of
+    `dump_compiled`, so it is not parsed again. Stored forms of another
+    expression text or jmespath version are ignored. Returns whether the
+    cache was seeded."""
+    if not serialized or expression in expression_cache:
+        return False
+    try:
+        stored = json.loads(serialized)
+    except ValueError:
+        return False
+    if stored.get('expression') != expression or stored.get('jmespath') != jmespath.__version__:
+        return False
+    expression_cache.put(expression, ParsedResult(expression, stored['ast']))
+    return True
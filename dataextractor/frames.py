@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""Extraction into NumPy arrays and pandas DataFrames.
+
+Records are extracted column by column into one buffer per field, without
+building a dict per record, and each buffer is converted to the narrowest
+array type that holds its values. NumPy is required; pandas is optional.
+"""
+from __future__ import unicode_literals
+import datetime
+from collections import OrderedDict
+
+
+_NUMBERS = frozenset([int, float, type(None)])
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("Array extraction requires NumPy.")
+    return numpy
+
+
+def _pandas():
+    try:
+        import pandas
+    except ImportError:
+        return None
+    return pandas
+
+
+def to_array(values, dtype=None):
+    """Converts a list of values to a NumPy array. Without `dtype`:
+
+    * integers give int64 arrays, or float64 with NaN when some are None;
+    * floats, possibly mixed with integers and None, give float64 arrays;
+    * booleans without None give bool arrays;
+    * naive dates and datetimes, possibly with None, give datetime64 arrays
+      with NaT for None;
+    * anything else gives an object array.
+    """
+    numpy = _numpy()
+    if dtype is not None:
+        return numpy.array(values, dtype=dtype)
+    types = set(map(type, values))
+    has_none = type(None) in types
+    types.discard(type(None))
+    if not types:
+        return _object_array(numpy, values)
+    if types == {int} and not has_none:
+        try:
+            return numpy.array(values, dtype=numpy.int64)
+        except OverflowError:
+            return _object_array(numpy, values)
+    if types <= _NUMBERS:
+        try:
+            return numpy.array(values, dtype=numpy.float64)
+        except OverflowError:
+            return _object_array(numpy, values)
+    if types == {bool} and not has_none:
+        return numpy.array(values, dtype=numpy.bool_)
+    if types <= {datetime.date, datetime.datetime}:
+        if datetime.datetime not in types:
+            return numpy.array(values, dtype='datetime64[D]')
+        if all(value is None or getattr(value, 'tzinfo', None) is None for value in values):
+            return numpy.array(values, dtype='datetime64[us]')
+    return _object_array(numpy, values)
+
+
+def _object_array(numpy, values):
+    # numpy.array would turn a column of lists into a 2D array.
+    array = numpy.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def to_arrays(columns, dtypes=None):
+    """Converts an ordered dict of columns, as returned by
+    `ExtractionPlan.extract_many(columns=True)`, to an ordered dict of
+    arrays. `dtypes` maps field names to explicit NumPy dtypes."""
+    dtypes = dtypes or {}
+    return OrderedDict(
+        (name, to_array(values, dtypes.get(name))) for name, values in columns.items())
+
+
+def extract_frame(data_extractors, records, dtypes=None, frame=True):
+    """Extracts many records into a pandas DataFrame with a column per field,
+    or into an ordered dict of NumPy arrays when `frame` is False or pandas
+    is not installed. data_extractors may be a list or a compiled plan."""
+    from . import plan as plan_module
+    if not isinstance(data_extractors, plan_module.ExtractionPlan):
+        data_extractors = plan_module.compile_extractors(data_extractors)
+    arrays = to_arrays(data_extractors.extract_many(records, columns=True), dtypes)
+    pandas = _pandas() if frame else None
+    if pandas is None:
+        return arrays
+    return pandas.DataFrame(arrays, columns=list(arrays))
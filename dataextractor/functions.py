@@ -1,36 +1,263 @@
 "Custom functions to use in expressions"
-import json
+import re
 import datetime
+import threading
+from functools import lru_cache
+from importlib import import_module
 from jmespath import functions
+from .conf import get_setting
 
 
+DATE_CACHE_SIZE = 4096
+FORMAT_CACHE_SIZE = 4096
+
+# Shapes accepted by strptime for the common ISO formats that fromisoformat
+# parses to the same value. Other shapes fall back to strptime.
+_ISO_FORMATS = {
+    '%Y-%m-%d': (re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}$'), 'date'),
+    '%Y-%m-%dT%H:%M:%S': (re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2}$'), 'datetime'),
+    '%H:%M:%S': (re.compile(r'[0-9]{2}:[0-9]{2}:[0-9]{2}$'), 'time'),
+}
+_STRPTIME_DATE = datetime.date(1900, 1, 1)
+
+
+def _fromisoformat(value, date_format):
+    "Parses common ISO formats without strptime, returns None otherwise."
+    try:
+        pattern, kind = _ISO_FORMATS[date_format]
+    except KeyError:
+        return None
+    if not pattern.match(value):
+        return None
+    try:
+        if kind == 'datetime':
+            return datetime.datetime.fromisoformat(value)
+        if kind == 'date':
+            return datetime.datetime.combine(datetime.date.fromisoformat(value), datetime.time())
+        return datetime.datetime.combine(_STRPTIME_DATE, datetime.time.fromisoformat(value))
+    except ValueError:
+        # Out of range values: let strptime raise its own error.
+        return None
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_datetime(value, date_format):
+    """Same as `datetime.datetime.strptime`, with a fast path for common ISO
+    formats and a bounded cache keyed on (value, date_format)."""
+    date = _fromisoformat(value, date_format)
+    if date is None:
+        date = datetime.datetime.strptime(value, date_format)
+    return date
+
+
+def date_cache_stats():
+    "Returns a dict with the counters of the date parsing cache."
+    info = parse_datetime.cache_info()
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'maxsize': info.maxsize,
+    }
+
+
+def _iso_date(value):
+    return '%04d-%02d-%02d' % (value.year, value.month, value.day)
+
+
+def _iso_datetime(separator):
+    template = '%04d-%02d-%02d' + separator + '%02d:%02d:%02d'
+
+    def iso_datetime(value):
+        return template % (value.year, value.month, value.day, value.hour, value.minute, value.second)
+    return iso_datetime
+
+
+def _iso_time(value):
+    return '%02d:%02d:%02d' % (value.hour, value.minute, value.second)
+
+
+# Formatters giving the same text as strftime for common ISO formats, by
+# format and value type. strftime does not pad years below 1000 on every
+# platform, so those dates still go through it.
+_ISO_FORMATTERS = {
+    ('%Y-%m-%d', datetime.date): _iso_date,
+    ('%Y-%m-%d', datetime.datetime): _iso_date,
+    ('%Y-%m-%dT%H:%M:%S', datetime.datetime): _iso_datetime('T'),
+    ('%Y-%m-%d %H:%M:%S', datetime.datetime): _iso_datetime(' '),
+    ('%H:%M:%S', datetime.datetime): _iso_time,
+    ('%H:%M:%S', datetime.time): _iso_time,
+}
+_DATE_TYPES = (datetime.datetime, datetime.date, datetime.time)
+# Types whose equal values always format the same. Aware datetimes and
+# times are equal across time zones, and floats and decimals have equal
+# values with different texts (0.0 and -0.0), so they are not cached.
+_CACHED_TYPES = frozenset([str, int, bool, datetime.date])
+_NAIVE_TYPES = frozenset([datetime.datetime, datetime.time])
+
+
+@lru_cache(maxsize=FORMAT_CACHE_SIZE)
+def compile_format(value_type, fmt):
+    """Returns the function formatting values of value_type with fmt, as
+    format() does: strftime for dates and times, str.format otherwise."""
+    if not issubclass(value_type, _DATE_TYPES):
+        return fmt.format
+    # Subclasses, such as pandas timestamps, may format differently.
+    iso_formatter = _ISO_FORMATTERS.get((fmt, value_type))
+    if iso_formatter is None:
+        return lambda value: value.strftime(fmt)
+    if value_type is datetime.time:
+        return iso_formatter
+
+    def format_date(value):
+        if value.year < 1000:
+            return value.strftime(fmt)
+        return iso_formatter(value)
+    return format_date
+
+
+@lru_cache(maxsize=FORMAT_CACHE_SIZE)
+def _format_cached(value_type, value, fmt):
+    # value_type is part of the key: True == 1 but they format differently.
+    return compile_format(value_type, fmt)(value)
+
+
+def format_value(value, fmt):
+    """Formats a value as format() does, caching the text of repeated
+    (value, fmt) pairs of immutable types."""
+    value_type = type(value)
+    if value_type in _CACHED_TYPES or (value_type in _NAIVE_TYPES and value.tzinfo is None):
+        return _format_cached(value_type, value, fmt)
+    return compile_format(value_type, fmt)(value)
+
+
+def format_cache_stats():
+    "Returns a dict with the counters of the format() value cache."
+    info = _format_cached.cache_info()
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'maxsize': info.maxsize,
+    }
+
+
+_json_loads = None
+_local = threading.local()
+
+
+def get_json_loads():
+    """Returns the function decoding the strings passed to json(). It is
+    selected with the DATAEXTRACTOR_JSON_DECODER setting: 'json' (the
+    default), 'orjson' or the dotted path of a loads-like callable."""
+    global _json_loads
+    if _json_loads is None:
+        name = get_setting('DATAEXTRACTOR_JSON_DECODER', 'json')
+        if name in ('json', 'orjson'):
+            _json_loads = import_module(name).loads
+        else:
+            module_name, attr = name.rsplit('.', 1)
+            _json_loads = getattr(import_module(module_name), attr)
+    return _json_loads
+
+
+def reset_json_decoder():
+    "Forgets the selected json decoder, so the setting is read again."
+    global _json_loads
+    _json_loads = None
+
+
+def begin_json_memo():
+    """Starts sharing the strings decoded by json() in the current thread
+    and returns the previous memo, to be passed to `end_json_memo`."""
+    previous = getattr(_local, 'json_memo', None)
+    _local.json_memo = {}
+    return previous
+
+
+def end_json_memo(previous):
+    "Stops sharing the strings decoded by json()."
+    _local.json_memo = previous
+
+
+class json_memo(object):
+    """Context manager decoding each distinct string passed to json() once.
+    The decoded values are shared, so they must not be modified."""
+
+    def __enter__(self):
+        self.previous = begin_json_memo()
+
+    def __exit__(self, *exc_info):
+        end_json_memo(self.previous)
+
 
 class Functions(functions.Functions):
-    "Custom functions to use in expressions."
+    """Custom functions to use in expressions.
+
+    if, coalesce and default have lazy implementations, used by the
+    interpreter and the closures backend of `expressions`, that only
+    evaluate the arguments they return. Other callers evaluate every
+    argument and get the same result.
+    """
+
+    # Function name -> method called with the functions evaluating the
+    # arguments and the current value.
+    LAZY_FUNCTIONS = {
+        'if': '_lazy_if',
+        'coalesce': '_lazy_coalesce',
+        'default': '_lazy_coalesce',
+    }
+
+    def get_lazy_function(self, name, argument_count):
+        """Returns the lazy implementation of a function, or None when it has
+        none or argument_count does not match its signature."""
+        method = self.LAZY_FUNCTIONS.get(name)
+        if method is None:
+            return None
+        signature = self.FUNCTION_TABLE[name]['signature']
+        if signature and signature[-1].get('variadic'):
+            if argument_count < len(signature):
+                return None
+        elif argument_count != len(signature):
+            return None
+        return getattr(self, method)
+
+    def _lazy_if(self, arguments, value):
+        condition, then_value, else_value = arguments
+        condition = condition(value)
+        self._type_check_single(condition, ['boolean'], 'if')
+        if condition:
+            return then_value(value)
+        return else_value(value)
+
+    def _lazy_coalesce(self, arguments, value):
+        for argument in arguments:
+            result = argument(value)
+            if result is not None:
+                return result
+        return None
 
     @functions.signature({'types': ['string']}, {'types': ['string']})
     def _func_date(self, value, date_format):
         "Converts an string to a datetime.date object."
-        date = datetime.datetime.strptime(value, date_format)
+        date = parse_datetime(value, date_format)
         return date.date()
 
     @functions.signature({'types': ['string']}, {'types': ['string']})
     def _func_time(self, value, date_format):
         "Converts an string to a datetime.time object."
-        date = datetime.datetime.strptime(value, date_format)
+        date = parse_datetime(value, date_format)
         return date.time()
 
     @functions.signature({'types': ['string']}, {'types': ['string']})
     def _func_datetime(self, value, date_format):
         "Converts an string to a datetime.datetime object."
-        date = datetime.datetime.strptime(value, date_format)
+        date = parse_datetime(value, date_format)
         return date
 
     @functions.signature({'types': []}, {'types': ['string']})
     def _func_format(self, value, fmt):
-        if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
-            return value.strftime(fmt)
-        return fmt.format(value)
+        return format_value(value, fmt)
 
     @functions.signature({'types': ['boolean']}, {'types': []}, {'types': []})
     def _func_if(self, condition, then_value, else_value):
@@ -39,6 +266,26 @@ class Functions(functions.Functions):
         else:
             return else_value
 
+    @functions.signature({'types': []}, {'types': [], 'variadic': True})
+    def _func_coalesce(self, *arguments):
+        "Returns the first argument that is not null."
+        for argument in arguments:
+            if argument is not None:
+                return argument
+        return None
+
+    @functions.signature({'types': []}, {'types': []})
+    def _func_default(self, value, default):
+        "Returns value, or default when value is null."
+        return default if value is None else value
+
     @functions.signature({'types': ['string']})
     def _func_json(self, json_str):
-        return json.loads(json_str)
+        memo = getattr(_local, 'json_memo', None)
+        if memo is None:
+            return (_json_loads or get_json_loads())(json_str)
+        try:
+            return memo[json_str]
+        except KeyError:
+            value = memo[json_str] = (_json_loads or get_json_loads())(json_str)
+            return value
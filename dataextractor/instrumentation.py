@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""Optional per-extractor timing and error instrumentation.
+
+Disabled by default: extraction only checks that `recorder` is None. Call
+`enable` to start recording and `disable` to stop.
+"""
+from __future__ import unicode_literals
+import threading
+import time
+
+
+# Active Recorder, None when instrumentation is disabled.
+recorder = None
+
+
+def extractor_key(extractor):
+    """Returns the name under which the measures of an extractor are
+    recorded: its field name, followed by its primary key when saved."""
+    pk = getattr(extractor, 'pk', None)
+    if pk is None:
+        return extractor.field_name
+    return '%s#%s' % (extractor.field_name, pk)
+
+
+class ExtractorStats(object):
+    "Measures of the calls to an extractor."
+    __slots__ = ('calls', 'total_time', 'max_time', 'none', 'empty', 'errors')
+
+    def __init__(self):
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.none = 0
+        self.empty = 0
+        self.errors = 0
+
+    def as_dict(self):
+        calls = self.calls or 1
+        return {
+            'calls': self.calls,
+            'total_time': self.total_time,
+            'max_time': self.max_time,
+            'mean_time': self.total_time / calls,
+            'none': self.none,
+            'none_rate': self.none / float(calls),
+            'empty': self.empty,
+            'empty_rate': self.empty / float(calls),
+            'errors': self.errors,
+        }
+
+
+class Recorder(object):
+    """Accumulates the measures of each extractor. `callback`, when given, is
+    called with (key, elapsed, value, error) after each measured call."""
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, key, elapsed, value, error=None):
+        with self._lock:
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = ExtractorStats()
+            stats.calls += 1
+            stats.total_time += elapsed
+            if elapsed > stats.max_time:
+                stats.max_time = elapsed
+            if error is not None:
+                stats.errors += 1
+            elif value is None:
+                stats.none += 1
+            elif not value and isinstance(value, (str, tuple, list, dict)):
+                stats.empty += 1
+        if self.callback is not None:
+            self.callback(key, elapsed, value, error)
+
+    def as_dict(self):
+        "Returns the measures of each extractor as plain dicts."
+        with self._lock:
+            return dict((key, stats.as_dict()) for key, stats in self.stats.items())
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+
+
+def enable(recorder_or_callback=None):
+    """Starts recording with the given Recorder, or with a new one calling
+    the given callback. Returns the active recorder."""
+    global recorder
+    if not isinstance(recorder_or_callback, Recorder):
+        recorder_or_callback = Recorder(callback=recorder_or_callback)
+    recorder = recorder_or_callback
+    return recorder
+
+
+def disable():
+    "Stops recording and returns the recorder that was active."
+    global recorder
+    previous, recorder = recorder, None
+    return previous
+
+
+def measure(key, function, data):
+    "Calls function(data) recording its duration, result or error under key."
+    active = recorder
+    if active is None:
+        return function(data)
+    timer = time.perf_counter
+    start = timer()
+    try:
+        value = function(data)
+    except Exception as error:
+        active.record(key, timer() - start, None, error)
+        raise
+    active.record(key, timer() - start, value)
+    return value
+
+
+def instrument(key, function):
+    "Returns a wrapper of function measuring its calls under key."
+    return lambda data: measure(key, function, data)
+
+
+def send_signal(key, elapsed, value, error):
+    "Recorder callback sending the `extractor_measured` Django signal."
+    from .signals import extractor_measured
+    extractor_measured.send(sender=Recorder, key=key, elapsed=elapsed, value=value, error=error)
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"Checks the expressions of every data extractor model."
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from dataextractor import expressions
+from dataextractor.models import DataExtractor
+
+
+class Command(BaseCommand):
+    help = ("Validates the expression of every row of the concrete data extractor models, "
+            "including the names and arity of the functions they call.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*',
+            help="Data extractor models as app_label.ModelName, all of them by default.")
+        parser.add_argument('--compile', action='store_true',
+            help="Stores the compiled form of the valid expressions that lack an up to date one.")
+
+    def get_models(self, labels):
+        if not labels:
+            return [model for model in apps.get_models() if issubclass(model, DataExtractor)]
+        try:
+            models = [apps.get_model(label) for label in labels]
+        except (LookupError, ValueError) as error:
+            raise CommandError(str(error))
+        for model in models:
+            if not issubclass(model, DataExtractor):
+                raise CommandError("Model '%s' is not a data extractor." % model._meta.label)
+        return models
+
+    def handle(self, *args, **options):
+        invalid = 0
+        for model in self.get_models(options['models']):
+            stale = []
+            checked = 0
+            for extractor in model._default_manager.exclude(expression='').order_by('pk'):
+                checked += 1
+                try:
+                    compiled = expressions.dump_compiled(extractor.expression)
+                except ValueError as error:
+                    invalid += 1
+                    self.stderr.write("%s #%s %s: %s" % (
+                        model._meta.label, extractor.pk, extractor.field_name, error))
+                    continue
+                if compiled != extractor.compiled_expression:
+                    extractor.compiled_expression = compiled
+                    stale.append(extractor)
+            if options['compile'] and stale:
+                model._default_manager.bulk_update(stale, ['compiled_expression'])
+            if options['verbosity'] > 1:
+                self.stdout.write("%s: %d expressions checked, %d compiled forms %s." % (
+                    model._meta.label, checked, len(stale), 'updated' if options['compile'] else 'stale'))
+        if invalid:
+            raise CommandError("%d invalid expressions found." % invalid)
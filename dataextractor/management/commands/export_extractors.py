@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"Exports the rows of a data extractor model as JSON, YAML or CSV."
+import io
+from django.core.management.base import BaseCommand, CommandError
+from dataextractor.models import get_extractor_model
+from dataextractor import bulk
+
+
+class Command(BaseCommand):
+    help = "Writes all the rows of a data extractor model as JSON, YAML or CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help="Data extractor model as app_label.ModelName.")
+        parser.add_argument('--output', '-o', default='-',
+            help="Output file, '-' writes to the standard output.")
+        parser.add_argument('--format', choices=bulk.FORMATS,
+            help="Output format, guessed from the output file extension by default.")
+
+    def handle(self, *args, **options):
+        try:
+            model = get_extractor_model(options['model'])
+        except (LookupError, ValueError) as error:
+            raise CommandError(str(error))
+        path = options['output']
+        file_format = options['format'] or bulk.guess_format(path)
+        try:
+            document = bulk.export_extractors(model._default_manager.all(), file_format)
+        except ValueError as error:
+            raise CommandError(str(error))
+        if path == '-':
+            self.stdout.ending = ''
+            self.stdout.write(document)
+        else:
+            with io.open(path, 'w', encoding='utf-8', newline='') as target:
+                target.write(document)
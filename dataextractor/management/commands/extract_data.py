@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"Extracts data from a JSON Lines or JSON array file."
+import io
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from dataextractor.models import get_extractor_model
+from dataextractor import streaming
+from dataextractor.projection import compile_projection
+
+
+class Command(BaseCommand):
+    help = ("Applies the rows of a data extractor model to each record of a JSON Lines "
+            "or JSON array file and writes the extracted data as JSON Lines, CSV, Parquet or Feather.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help="Data extractor model as app_label.ModelName.")
+        parser.add_argument('input', help="Input file, '-' reads from the standard input.")
+        parser.add_argument('--input-format', choices=['auto', 'jsonl', 'json'], default='auto')
+        parser.add_argument('--output', '-o', default='-',
+            help="Output file, '-' writes to the standard output.")
+        parser.add_argument('--output-format', choices=['jsonl', 'csv', 'parquet', 'feather'],
+            default='jsonl', help="Parquet and Feather output require pyarrow and an output file.")
+        parser.add_argument('--batch-size', type=int, default=streaming.DEFAULT_BATCH_SIZE,
+            help="Number of records extracted at a time.")
+        parser.add_argument('--workers', type=int,
+            help="Number of worker processes, by default records are extracted in this process.")
+        parser.add_argument('--flush-every', type=int, default=streaming.DEFAULT_BATCH_SIZE,
+            help="Number of rows written between flushes of the output.")
+        parser.add_argument('--prune', action='store_true',
+            help="Reduce each record to the input paths read by the extractors while decoding it.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        try:
+            model = get_extractor_model(options['model'])
+        except (LookupError, ValueError) as error:
+            raise CommandError(str(error))
+        extractors = list(model._default_manager.order_by('pk'))
+        plan = model.compile_extractors(extractors)
+        projection = compile_projection(extractors) if options['prune'] else None
+        if options['output_format'] in ('parquet', 'feather'):
+            return self.handle_columnar(extractors, plan, projection, options)
+
+        source = self.open(options['input'], 'r', sys.stdin)
+        # The writers terminate their own lines.
+        self.stdout.ending = ''
+        target = self.open(options['output'], 'w', self.stdout)
+        try:
+            records = streaming.iter_records(source, options['input_format'],
+                                             projection=projection)
+            if options['output_format'] == 'csv':
+                writer = streaming.CSVWriter(target, plan.field_names, flush_every=options['flush_every'])
+            else:
+                writer = streaming.JSONLinesWriter(target, flush_every=options['flush_every'])
+            if options['workers']:
+                rows = streaming.extract_stream(extractors, records, batch_size=options['batch_size'],
+                                                workers=options['workers'])
+            else:
+                rows = streaming.extract_stream(plan, records, batch_size=options['batch_size'])
+            try:
+                count = streaming.write_stream(writer, rows)
+            except ValueError as error:
+                raise CommandError("Invalid input: %s" % error)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if target is not self.stdout:
+                target.close()
+        if options['verbosity'] > 1:
+            self.stderr.write("%d records extracted." % count)
+
+    def handle_columnar(self, extractors, plan, projection, options):
+        from dataextractor import columnar
+        if options['output'] == '-':
+            raise CommandError("%s output requires an output file." % options['output_format'])
+        source = self.open(options['input'], 'r', sys.stdin)
+        try:
+            records = streaming.iter_records(source, options['input_format'],
+                                             projection=projection)
+            try:
+                if options['workers']:
+                    writer = columnar.ArrowWriter(options['output'], plan.field_names,
+                                                  file_format=options['output_format'],
+                                                  batch_size=options['batch_size'],
+                                                  schema=columnar.output_schema(extractors))
+                    rows = streaming.extract_stream(extractors, records, batch_size=options['batch_size'],
+                                                    workers=options['workers'])
+                    try:
+                        count = streaming.write_stream(writer, rows)
+                    except Exception:
+                        writer.discard()
+                        raise
+                else:
+                    count = columnar.write_columnar(plan, records, options['output'],
+                                                    file_format=options['output_format'],
+                                                    batch_size=options['batch_size'],
+                                                    schema=columnar.output_schema(extractors))
+            except ImportError as error:
+                raise CommandError(str(error))
+            except ValueError as error:
+                raise CommandError("Invalid input: %s" % error)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        if options['verbosity'] > 1:
+            self.stderr.write("%d records extracted." % count)
+
+    @staticmethod
+    def open(path, mode, default):
+        if path == '-':
+            return default
+        return io.open(path, mode, encoding='utf-8', newline='' if 'w' in mode else None)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"Creates and updates the rows of a data extractor model from JSON, YAML or CSV."
+import io
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from dataextractor.models import get_extractor_model
+from dataextractor import bulk
+
+
+class Command(BaseCommand):
+    help = ("Creates and updates the rows of a data extractor model from a JSON, YAML or CSV "
+            "file. Rows with an id update that row. Invalid rows are reported and skipped.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help="Data extractor model as app_label.ModelName.")
+        parser.add_argument('input', help="Input file, '-' reads from the standard input.")
+        parser.add_argument('--format', choices=bulk.FORMATS,
+            help="Input format, guessed from the input file extension by default.")
+
+    def handle(self, *args, **options):
+        try:
+            model = get_extractor_model(options['model'])
+        except (LookupError, ValueError) as error:
+            raise CommandError(str(error))
+        path = options['input']
+        file_format = options['format'] or bulk.guess_format(path)
+        source = sys.stdin if path == '-' else io.open(path, 'r', encoding='utf-8', newline='')
+        try:
+            rows = bulk.read_rows(source, file_format)
+        except ValueError as error:
+            raise CommandError("Invalid input: %s" % error)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        result = bulk.import_extractors(model, rows)
+        for error in result.errors:
+            self.stderr.write(str(error))
+        self.stdout.write("%d created, %d updated, %d skipped." % (
+            result.created, result.updated, len(result.errors)))
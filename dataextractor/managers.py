@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"Managers of the data extractor models and the cache of compiled extractor sets."
+from __future__ import unicode_literals
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.db import models, transaction
+from .conf import get_setting
+from . import plan
+
+
+DEFAULT_CACHE_SIZE = 256
+
+
+class CompiledExtractorCache(object):
+    """Process-local cache of the extraction plans compiled from querysets.
+
+    Each model has a version stamp that changes whenever one of its rows is
+    saved or deleted. When the DATAEXTRACTOR_CACHE setting names a Django
+    cache, the stamp and the serialized extractor configurations are kept
+    there, so every worker process sharing that cache sees the changes and
+    only the first one to miss hits the database. Otherwise the stamp is
+    local to the process. At most `maxsize` plans are kept, the least
+    recently used are dropped first.
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._plans = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _label(model):
+        return model._meta.concrete_model._meta.label_lower
+
+    @staticmethod
+    def _shared_cache():
+        alias = get_setting('DATAEXTRACTOR_CACHE')
+        return caches[alias] if alias else None
+
+    def get_version(self, model):
+        "Returns the current version stamp of the rows of a model."
+        label = self._label(model)
+        shared = self._shared_cache()
+        if shared is None:
+            return self._versions.setdefault(label, uuid.uuid4().hex)
+        key = 'dataextractor:version:%s' % label
+        version = shared.get(key)
+        if version is None:
+            shared.add(key, uuid.uuid4().hex, None)
+            version = shared.get(key)
+        return version
+
+    def invalidate(self, model, using=None):
+        """Marks the compiled extractor sets of a model as stale once the
+        current transaction of the `using` database commits. Bumping the
+        stamp earlier would let other processes cache the rows they still
+        see under the new stamp."""
+        transaction.on_commit(lambda: self._bump_version(model), using=using)
+
+    def _bump_version(self, model):
+        label = self._label(model)
+        version = uuid.uuid4().hex
+        self._versions[label] = version
+        shared = self._shared_cache()
+        if shared is not None:
+            shared.set('dataextractor:version:%s' % label, version, None)
+
+    def get(self, queryset):
+        "Returns the extraction plan of a queryset, compiling it when stale."
+        label = self._label(queryset.model)
+        try:
+            query = str(queryset.query)
+        except EmptyResultSet:
+            # The queryset matches no rows, such as none() or __in=[].
+            return plan.compile_extractors([])
+        version = self.get_version(queryset.model)
+        key = (label, query)
+        with self._lock:
+            entry = self._plans.get(key)
+            if entry is not None and entry[0] == version:
+                self._plans.move_to_end(key)
+                return entry[1]
+        shared = self._shared_cache()
+        config = None
+        if shared is not None:
+            config_key = 'dataextractor:config:%s:%s:%s' % (
+                label, version, hashlib.sha1(query.encode('utf-8')).hexdigest())
+            config = shared.get(config_key)
+        if config is None:
+            config = plan.serialize_extractors(queryset.all())
+            if shared is not None:
+                shared.set(config_key, config)
+        compiled = plan.compile_extractors(plan.deserialize_extractors(config))
+        with self._lock:
+            self._plans[key] = (version, compiled)
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.maxsize:
+                self._plans.popitem(last=False)
+        return compiled
+
+    def clear(self):
+        "Forgets all the compiled extractor sets of this process."
+        with self._lock:
+            self._plans.clear()
+            self._versions.clear()
+
+
+compiled_extractors = CompiledExtractorCache()
+
+
+class DataExtractorQuerySet(models.QuerySet):
+
+    def compiled(self):
+        """Returns the extraction plan of the extractors of this queryset from
+        the process-local cache. Order the queryset to get a predictable
+        plan."""
+        return compiled_extractors.get(self)
+
+    async def acompiled(self):
+        "Asynchronous version of `compiled`."
+        from asgiref.sync import sync_to_async
+        return await sync_to_async(self.compiled)()
+
+    # Bulk operations do not send post_save/post_delete signals.
+
+    def update(self, **kwargs):
+        rows = super(DataExtractorQuerySet, self).update(**kwargs)
+        compiled_extractors.invalidate(self.model, using=self.db)
+        return rows
+
+    def bulk_create(self, *args, **kwargs):
+        objs = super(DataExtractorQuerySet, self).bulk_create(*args, **kwargs)
+        compiled_extractors.invalidate(self.model, using=self.db)
+        return objs
+
+    def bulk_update(self, *args, **kwargs):
+        rows = super(DataExtractorQuerySet, self).bulk_update(*args, **kwargs)
+        compiled_extractors.invalidate(self.model, using=self.db)
+        return rows
+
+
+DataExtractorManager = models.Manager.from_queryset(DataExtractorQuerySet)
@@ -1,11 +1,26 @@
 # -*- coding: utf-8 -*-
 # pylint: disable=missing-module-docstring
 from __future__ import unicode_literals
-from collections import OrderedDict
-import jmespath
+from django.apps import apps
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils.translation import ugettext_lazy as _
-from .functions import Functions
+from . import coercion
+from . import engine
+from .managers import DataExtractorManager
+from .specs import ExtractorSpec
+
+
+OUTPUT_TYPE_CHOICES = (
+    ('int', _("Integer")),
+    ('float', _("Float")),
+    ('decimal', _("Decimal")),
+    ('bool', _("Boolean")),
+    ('date', _("Date")),
+    ('datetime', _("Date and time")),
+    ('str', _("Text")),
+    ('json', _("JSON")),
+)
 
 
 class DataExtractor(models.Model):
@@ -15,6 +30,11 @@ class DataExtractor(models.Model):
     value = models.TextField(_("Default value"), blank=True, default='')
     expression = models.CharField(_("Expression"), max_length=250, blank=True, default='')
     omit_empty = models.BooleanField(_("Exclude if empty"), blank=True, default=False)
+    output_type = models.CharField(_("Output type"), max_length=10, blank=True, default='',
+                                   choices=OUTPUT_TYPE_CHOICES)
+    compiled_expression = models.TextField(_("Compiled expression"), blank=True, default='', editable=False)
+
+    objects = DataExtractorManager()
 
     class Meta:
         abstract = True
@@ -24,31 +44,71 @@ class DataExtractor(models.Model):
     def __str__(self):
         return self.field_name
 
+    def compile_expression(self):
+        """Validates the expression, including the names and arity of the
+        functions it calls, and stores its compiled form in
+        `compiled_expression`. Raises ValidationError when invalid."""
+        if not self.expression:
+            self.compiled_expression = ''
+            return
+        try:
+            self.compiled_expression = engine.dump_compiled(self.expression)
+        except ValueError as error:
+            raise ValidationError({'expression': str(error)})
+
+    def clean(self):
+        super(DataExtractor, self).clean()
+        self.compile_expression()
+        if self.value and self.output_type:
+            try:
+                coercion.get_coercer(self.output_type)(self.value)
+            except (TypeError, ValueError, ArithmeticError) as error:
+                raise ValidationError({'value': str(error)})
+
+    def save(self, *args, **kwargs):
+        self.compile_expression()
+        super(DataExtractor, self).save(*args, **kwargs)
+
+    def to_spec(self):
+        "Returns the `ExtractorSpec` of this extractor."
+        return ExtractorSpec.from_extractor(self)
+
     def get_value(self, data):
         "Extracts data from a data dict."
-        if self.omit:
-            return None
-        if self.value:
-            return self.value
-        if self.expression:
-            options = jmespath.Options(custom_functions=Functions())
-            return jmespath.search(self.expression, data, options=options)
-        return data.get(self.field_name)
+        return engine.get_value(self, data)
 
     def get_data(self, data):
         "extracts an ordered dict from data parameter."
-        if self.omit:
-            return OrderedDict()
-        value = self.get_value(data)
-        if self.omit_empty and value is None:
-            return OrderedDict()
-        return OrderedDict([[self.field_name, value]])
+        return engine.get_data(self, data)
 
     @staticmethod
     def merge_data_extractors(data_extractors, data):
-        result = OrderedDict()
-        for extractor in data_extractors:
-            extracted_data = extractor.get_data(data)
-            for key, value in extracted_data.items():
-                result[key] = value
-        return result
\ No newline at end of file
+        return engine.merge_data_extractors(data_extractors, data)
+
+    @staticmethod
+    def compile_extractors(data_extractors):
+        "Compiles data extractors into a reusable `ExtractionPlan`."
+        return engine.compile_extractors(data_extractors)
+
+    @staticmethod
+    def extract_many(data_extractors, records, columns=False, out=None, workers=None,
+                     chunk_size=engine.DEFAULT_CHUNK_SIZE):
+        """Extracts data from many records, as a list of rows or as columns.
+        See `engine.extract_many`."""
+        return engine.extract_many(data_extractors, records, columns=columns, out=out,
+                                   workers=workers, chunk_size=chunk_size)
+
+    @staticmethod
+    def extract_frame(data_extractors, records, dtypes=None, frame=True):
+        """Extracts many records into a pandas DataFrame, or a dict of NumPy
+        arrays. See `frames.extract_frame`."""
+        return engine.extract_frame(data_extractors, records, dtypes=dtypes, frame=frame)
+
+
+def get_extractor_model(label):
+    """Returns the concrete `DataExtractor` subclass registered with an
+    'app_label.ModelName' label."""
+    model = apps.get_model(label)
+    if not issubclass(model, DataExtractor):
+        raise LookupError("Model '%s' is not a data extractor." % label)
+    return model
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"Process pool execution of extraction plans."
+from __future__ import unicode_literals
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+from . import plan as plan_module
+from .engine import DEFAULT_CHUNK_SIZE
+
+
+# Plan compiled once per worker process by _init_worker.
+_worker_plan = None
+
+
+def _init_worker(config):
+    global _worker_plan
+    _worker_plan = plan_module.compile_extractors(plan_module.deserialize_extractors(config))
+
+
+def _extract_chunk(chunk, columns=False):
+    return _worker_plan.extract_many(chunk, columns=columns)
+
+
+# Plans compiled by extract_config_chunk in this process, by configuration.
+_config_plans = {}
+MAX_CONFIG_PLANS = 32
+
+
+def extract_config_chunk(config, chunk, columns=False):
+    """Extracts a chunk of records with the configuration returned by
+    `serialize_extractors`. Suitable for any executor: the plan is compiled
+    once per configuration and process."""
+    compiled = _config_plans.get(config)
+    if compiled is None:
+        if len(_config_plans) >= MAX_CONFIG_PLANS:
+            _config_plans.clear()
+        compiled = _config_plans[config] = plan_module.compile_extractors(
+            plan_module.deserialize_extractors(config))
+    return compiled.extract_many(chunk, columns=columns)
+
+
+class ParallelExtractor(object):
+    """Runs extraction in a pool of worker processes.
+
+    The extractor configuration is sent to each worker once, when the pool
+    starts, and compiled there. Records are sent in chunks of chunk_size and
+    the results come back in the original order. `workers` defaults to the
+    number of CPUs. Inputs smaller than min_records are extracted in the
+    current process.
+
+    Use it as a context manager, or call `close` when done, to shut the pool
+    down.
+    """
+
+    def __init__(self, data_extractors, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, min_records=None):
+        self.config = plan_module.serialize_extractors(data_extractors)
+        self.plan = plan_module.compile_extractors(plan_module.deserialize_extractors(self.config))
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.min_records = 2 * chunk_size if min_records is None else min_records
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker, initargs=(self.config,))
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _chunks(self, records):
+        records = iter(records)
+        while True:
+            chunk = list(islice(records, self.chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def extract_many(self, records, columns=False):
+        "Same as `ExtractionPlan.extract_many`, using the worker processes."
+        if not isinstance(records, (list, tuple)):
+            records = list(records)
+        if self.workers == 1 or len(records) < self.min_records:
+            return self.plan.extract_many(records, columns=columns)
+        results = self.executor.map(_extract_chunk, self._chunks(records), repeat(columns))
+        if not columns:
+            rows = []
+            for chunk in results:
+                rows.extend(chunk)
+            return rows
+        output = None
+        for chunk in results:
+            if output is None:
+                output = chunk
+            else:
+                for name, values in chunk.items():
+                    output[name].extend(values)
+        return output if output is not None else self.plan.extract_many([], columns=True)
+
+    def extract_stream(self, records, max_pending=None):
+        """Yields the data extracted from each record of an iterable. At most
+        max_pending chunks (twice the number of workers by default) are in
+        flight, so a fast reader cannot fill the memory."""
+        chunks = self._chunks(records)
+        first = next(chunks, None)
+        if first is None:
+            return
+        if self.workers == 1 or len(first) < self.chunk_size:
+            # A single partial chunk is not worth a round trip to a worker.
+            for row in self.plan.extract_many(first):
+                yield row
+            for chunk in chunks:
+                for row in self.plan.extract_many(chunk):
+                    yield row
+            return
+        executor = self.executor
+        if max_pending is None:
+            max_pending = 2 * self.workers
+        pending = deque([executor.submit(_extract_chunk, first)])
+        for chunk in chunks:
+            if len(pending) >= max_pending:
+                for row in pending.popleft().result():
+                    yield row
+            pending.append(executor.submit(_extract_chunk, chunk))
+        while pending:
+            for row in pending.popleft().result():
+                yield row
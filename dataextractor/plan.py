@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+"Reusable extraction plans compiled from a set of data extractors."
+from __future__ import unicode_literals
+from collections import OrderedDict
+from . import coercion
+from . import expressions
+from . import functions
+from . import instrumentation
+from .specs import ExtractorSpec, to_specs
+from .subexpressions import share_paths
+
+
+def serialize_extractors(data_extractors):
+    "Returns the configuration of data extractors as a tuple of `ExtractorSpec`."
+    return to_specs(data_extractors)
+
+
+def deserialize_extractors(config):
+    """Returns the `ExtractorSpec` of each row of the output of
+    `serialize_extractors`, which may have been stored as plain tuples."""
+    return [ExtractorSpec(*row) for row in config]
+
+
+def _make_getter(extractor):
+    "Returns a callable extracting the value of a non constant extractor."
+    if extractor.expression:
+        return expressions.compile_evaluator(extractor.expression)
+    field_name = extractor.field_name
+    return lambda data: data.get(field_name)
+
+
+def _make_resolver(steps):
+    """Returns a callable resolving a field set by several extractors: the
+    last one whose value is not dropped by `omit_empty` wins."""
+    steps = tuple(reversed(steps))
+
+    def resolve(data):
+        for _, getter, constant, omit_empty in steps:
+            if getter is None:
+                return constant
+            value = getter(data)
+            if value is not None or not omit_empty:
+                return value
+        return None
+    return resolve
+
+
+def _is_droppable(step):
+    "A step is droppable when its value may be omitted from the output."
+    _, getter, _, omit_empty = step
+    return getter is not None and omit_empty
+
+
+class ExtractionPlan(object):
+    """Immutable and reusable form of a list of data extractors.
+
+    Produces the same output as `DataExtractor.merge_data_extractors` but
+    resolves omitted extractors, overridden field names and constant values
+    once, when the plan is compiled. Extractors overridden by a later
+    extractor that always sets the field are never evaluated.
+    """
+    __slots__ = ('_fields', '_dynamic', '_json_memo', '_instrumented_fields', '_prefetch')
+
+    def __init__(self, fields, json_memo=False, instrumented_fields=None, prefetch=None):
+        # Each field is a (name, getter, constant, steps, position) tuple.
+        # `getter` is None for constant fields and `position` is the index
+        # of the first extractor of the field. `steps` is only set for
+        # dynamic fields, the ones whose first extractor may be dropped by
+        # `omit_empty`: their presence and position depend on the data.
+        object.__setattr__(self, '_fields', tuple(fields))
+        object.__setattr__(self, '_dynamic', any(field[3] for field in self._fields))
+        # When some expression calls json() the decoded strings are shared by
+        # all the extractors for the duration of each record.
+        object.__setattr__(self, '_json_memo', json_memo)
+        # Same fields with their getters measured, used while instrumentation
+        # is enabled.
+        if instrumented_fields is None:
+            instrumented_fields = self._fields
+        object.__setattr__(self, '_instrumented_fields', tuple(instrumented_fields))
+        # When the expressions share path prefixes, prefetch evaluates all
+        # the paths of a record at once and the getters read its result.
+        object.__setattr__(self, '_prefetch', prefetch)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ExtractionPlan objects are immutable")
+
+    def __len__(self):
+        return len(self._fields)
+
+    @property
+    def field_names(self):
+        "Names of the fields the plan can output, in output order."
+        return tuple(field[0] for field in self._fields)
+
+    def extract(self, data):
+        "Extracts an ordered dict from data."
+        if self._json_memo:
+            previous = functions.begin_json_memo()
+            try:
+                return self._extract(data)
+            finally:
+                functions.end_json_memo(previous)
+        return self._extract(data)
+
+    def _extract(self, data):
+        fields = self._fields if instrumentation.recorder is None else self._instrumented_fields
+        if self._prefetch is not None:
+            data = self._prefetch(data)
+        if self._dynamic:
+            return self._extract_dynamic(fields, data)
+        result = OrderedDict()
+        for name, getter, constant, _, _ in fields:
+            result[name] = constant if getter is None else getter(data)
+        return result
+
+    def extract_many(self, records, columns=False, out=None):
+        """Extracts the data of many records.
+
+        Returns a list with an ordered dict per record or, when `columns` is
+        True, an ordered dict mapping each field name to the list of its
+        values; fields omitted from a record get None in its column. `out`
+        may be a preallocated list (or dict of lists) that receives the
+        results: its existing items are overwritten in place and it grows
+        when there are more records than items.
+        """
+        if columns:
+            return self._extract_columns(records, out)
+        if out is None:
+            return [self.extract(data) for data in records]
+        size = len(out)
+        for index, data in enumerate(records):
+            if index < size:
+                out[index] = self.extract(data)
+            else:
+                out.append(self.extract(data))
+        return out
+
+    def extract_frame(self, records, dtypes=None, frame=True):
+        """Extracts many records into a pandas DataFrame, or a dict of NumPy
+        arrays. See `frames.extract_frame`."""
+        from .frames import extract_frame
+        return extract_frame(self, records, dtypes=dtypes, frame=frame)
+
+    def _extract_columns(self, records, out):
+        if not isinstance(records, (list, tuple)):
+            records = list(records)
+        if out is None:
+            out = OrderedDict((name, []) for name in self.field_names)
+        if self._dynamic or self._json_memo or instrumentation.recorder is not None:
+            return self._extract_rows(records, out)
+        count = len(records)
+        if self._prefetch is not None:
+            records = [self._prefetch(data) for data in records]
+        for name, getter, constant, _, _ in self._fields:
+            if getter is None:
+                values = [constant] * count
+            elif hasattr(getter, 'path'):
+                # Plain paths are followed one level at a time for the whole
+                # column instead of record by record.
+                values = records
+                for lookup, key in getter.path:
+                    values = [lookup(value, key) for value in values]
+            else:
+                values = [getter(data) for data in records]
+            _fill(out.setdefault(name, []), values)
+        return out
+
+    def _extract_rows(self, records, out):
+        # Record by record, for the plans whose getters cannot run column by
+        # column, appending the values straight into the columns.
+        fields = self._fields if instrumentation.recorder is None else self._instrumented_fields
+        columns = [[] for _ in fields]
+        for data in records:
+            if self._json_memo:
+                previous = functions.begin_json_memo()
+            try:
+                if self._prefetch is not None:
+                    data = self._prefetch(data)
+                for values, (_, getter, constant, steps, _) in zip(columns, fields):
+                    if steps:
+                        values.append(_resolve(steps, data))
+                    else:
+                        values.append(constant if getter is None else getter(data))
+            finally:
+                if self._json_memo:
+                    functions.end_json_memo(previous)
+        for field, values in zip(fields, columns):
+            _fill(out.setdefault(field[0], []), values)
+        return out
+
+    def _extract_dynamic(self, fields, data):
+        found = []
+        for name, getter, constant, steps, position in fields:
+            if not steps:
+                found.append((position, name, constant if getter is None else getter(data)))
+                continue
+            first = None
+            value = None
+            for index, step_getter, step_constant, omit_empty in steps:
+                step_value = step_constant if step_getter is None else step_getter(data)
+                if step_value is None and omit_empty:
+                    continue
+                if first is None:
+                    first = index
+                value = step_value
+            if first is not None:
+                found.append((first, name, value))
+        found.sort(key=lambda item: item[0])
+        return OrderedDict((name, value) for _, name, value in found)
+
+
+def _resolve(steps, data):
+    "Returns the value of a dynamic field, None when every step is omitted."
+    value = None
+    for _, getter, constant, omit_empty in steps:
+        step_value = constant if getter is None else getter(data)
+        if step_value is not None or not omit_empty:
+            value = step_value
+    return value
+
+
+def _fill(target, values):
+    "Writes values into target overwriting its items in place."
+    target[:len(values)] = values
+
+
+def fill_output(out, result, columns=False):
+    """Writes the result of an extraction into a preallocated output. See
+    `ExtractionPlan.extract_many`."""
+    if columns:
+        for name, values in result.items():
+            _fill(out.setdefault(name, []), values)
+    else:
+        _fill(out, result)
+    return out
+
+
+def _live_steps(steps):
+    """Returns the steps of a field that can set its value: when the first
+    step always sets the field, the steps before the last one that always
+    sets it are dead."""
+    if _is_droppable(steps[0]):
+        return steps
+    last = max(i for i, step in enumerate(steps) if not _is_droppable(step))
+    return steps[last:]
+
+
+def _build_fields(steps_by_name):
+    fields = []
+    for name, steps in steps_by_name.items():
+        position = steps[0][0]
+        if _is_droppable(steps[0]):
+            # The position of the field depends on the data.
+            fields.append((name, None, None, tuple(steps), position))
+            continue
+        steps = _live_steps(steps)
+        if len(steps) == 1:
+            _, getter, constant, _ = steps[0]
+            fields.append((name, getter, constant, None, position))
+        else:
+            fields.append((name, _make_resolver(steps), None, None, position))
+    return fields
+
+
+def compile_extractors(data_extractors):
+    """Compiles a queryset or a list of data extractors into an
+    `ExtractionPlan`."""
+    steps = []
+    keys = {}
+    coercers = {}
+    json_memo = False
+    for index, extractor in enumerate(data_extractors):
+        if extractor.omit:
+            continue
+        coercer = coercion.get_coercer(getattr(extractor, 'output_type', None))
+        if extractor.value:
+            constant = extractor.value
+            if coercer is not None:
+                # Coerced once here instead of on every record.
+                constant = coercion.coerce_constant(
+                    coercer, constant, instrumentation.extractor_key(extractor))
+            if constant is None and extractor.omit_empty:
+                # Such as 'null' with the json output type: always dropped.
+                continue
+            steps.append((extractor.field_name, (index, None, constant, extractor.omit_empty)))
+            continue
+        if extractor.expression:
+            # Before anything parses the expression, or the stored form is
+            # ignored.
+            compiled = getattr(extractor, 'compiled_expression', None)
+            if compiled:
+                expressions.preload(extractor.expression, compiled)
+        if extractor.expression and not json_memo:
+            parsed = expressions.compile_expression(extractor.expression).parsed
+            json_memo = 'json' in expressions.function_names(parsed)
+        keys[index] = instrumentation.extractor_key(extractor)
+        if coercer is not None:
+            coercers[index] = coercer
+        steps.append((extractor.field_name,
+                      (index, _make_getter(extractor), None, extractor.omit_empty)))
+
+    steps_by_name = OrderedDict()
+    for name, step in steps:
+        steps_by_name.setdefault(name, []).append(step)
+    live = set(step[0] for field_steps in steps_by_name.values()
+               for step in _live_steps(field_steps) if step[1] is not None)
+    prefetch = None
+    shared = share_paths([step[1] for _, step in steps if step[0] in live])
+    if shared is not None:
+        # Dead steps keep their getters, _build_fields drops them anyway.
+        prefetch, transform = shared
+        steps = [(name, (index, transform(getter) if index in live else getter, constant, omit_empty))
+                 for name, (index, getter, constant, omit_empty) in steps]
+    if coercers:
+        steps = [(name, (index, coercion.coerce_getter(getter, coercers[index], keys[index])
+                         if index in coercers else getter, constant, omit_empty))
+                 for name, (index, getter, constant, omit_empty) in steps]
+
+    steps_by_name = OrderedDict()
+    instrumented_steps = OrderedDict()
+    for name, step in steps:
+        index, getter, constant, omit_empty = step
+        steps_by_name.setdefault(name, []).append(step)
+        if getter is not None:
+            step = (index, instrumentation.instrument(keys[index], getter), constant, omit_empty)
+        instrumented_steps.setdefault(name, []).append(step)
+    return ExtractionPlan(_build_fields(steps_by_name), json_memo=json_memo,
+                          instrumented_fields=_build_fields(instrumented_steps), prefetch=prefetch)
@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+"""Input paths read by a set of data extractors, and documents reduced to them.
+
+`input_paths` walks the AST of each expression and returns the paths of the
+input that the extractors may read. A `Projection` of those paths prunes
+decoded documents, or decodes JSON text dropping the values outside them,
+so that extracting from the reduced document gives the same result as
+extracting from the whole one.
+
+A path is a tuple of object keys and `ANY`, which stands for every item of
+an array or every value of an object. The whole value at the end of a path
+is kept; arrays of a path are kept with all their items, and values of the
+wrong kind for a path (an array where an object key is read) are kept
+whole, so truthiness, lengths and indexes do not change.
+"""
+from __future__ import unicode_literals
+import json
+import re
+from json.decoder import JSONDecodeError, scanstring
+from . import expressions
+
+
+class _Any(object):
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'ANY'
+
+    def __reduce__(self):
+        return 'ANY'
+
+
+ANY = _Any()
+_MISSING = object()
+
+# Functions returning one of their arguments unchanged. The other functions
+# read the whole value of their arguments.
+_PASS_THROUGH = {
+    'coalesce': None,
+    'default': None,
+    'not_null': None,
+    'if': (1, 2),
+}
+
+
+class _List(object):
+    "A list built by the expression, whose items come from the given sources."
+    __slots__ = ('items',)
+
+    def __init__(self, items):
+        self.items = items
+
+
+def _child(sources, key):
+    return [source + (key,) for source in sources if isinstance(source, tuple)]
+
+
+def _items(sources):
+    items = []
+    for source in sources:
+        if isinstance(source, tuple):
+            items.append(source + (ANY,))
+        else:
+            items.extend(source.items)
+    return items
+
+
+def _need(sources, paths):
+    for source in sources:
+        if isinstance(source, tuple):
+            paths.add(source)
+        else:
+            _need(source.items, paths)
+
+
+def _visit(node, sources, paths):
+    """Returns the sources of the value of node evaluated on values coming
+    from sources, adding to paths the ones whose whole value is read."""
+    node_type = node['type']
+    children = node.get('children', [])
+    if node_type in ('current', 'identity'):
+        return sources
+    if node_type == 'field':
+        return _child(sources, node['value'])
+    if node_type in ('subexpression', 'index_expression', 'pipe'):
+        for child in children:
+            sources = _visit(child, sources, paths)
+        return sources
+    if node_type == 'index':
+        return _items(sources)
+    if node_type == 'slice':
+        return sources
+    if node_type == 'flatten':
+        items = _items(_visit(children[0], sources, paths))
+        return [_List(items + _items(items))]
+    if node_type in ('projection', 'value_projection', 'filter_projection'):
+        base = _visit(children[0], sources, paths)
+        if node_type == 'value_projection':
+            items = [source + (ANY,) for source in base if isinstance(source, tuple)]
+        else:
+            items = _items(base)
+        if node_type == 'filter_projection':
+            _need(_visit(children[2], items, paths), paths)
+        return [_List(_visit(children[1], items, paths))]
+    if node_type == 'multi_select_list':
+        items = []
+        for child in children:
+            items.extend(_visit(child, sources, paths))
+        return [_List(items)]
+    if node_type == 'literal':
+        return []
+    if node_type in ('or_expression', 'and_expression'):
+        left = _visit(children[0], sources, paths)
+        # The truthiness of the left value is tested.
+        _need(left, paths)
+        return left + _visit(children[1], sources, paths)
+    if node_type == 'function_expression' and node['value'] in _PASS_THROUGH:
+        returned = _PASS_THROUGH[node['value']] or range(len(children))
+        results = []
+        for index, child in enumerate(children):
+            child_sources = _visit(child, sources, paths)
+            if index in returned:
+                results.extend(child_sources)
+            else:
+                _need(child_sources, paths)
+        return results
+    if node_type == 'expref':
+        # Applied to the arguments of its function, which are read whole.
+        return []
+    if node_type in ('function_expression', 'comparator', 'not_expression', 'multi_select_dict',
+                     'key_val_pair'):
+        for child in children:
+            _need(_visit(child, sources, paths), paths)
+        return []
+    # Unknown nodes read the whole current value.
+    _need(sources, paths)
+    return []
+
+
+def expression_paths(expression):
+    "Returns the set of input paths an expression may read."
+    paths = set()
+    parsed = expressions.compile_expression(expression).parsed
+    _need(_visit(parsed, [()], paths), paths)
+    return paths
+
+
+def input_paths(data_extractors):
+    """Returns the set of input paths a list of data extractors may read:
+    the paths read by their expressions and the field names of the ones
+    without expression. An empty tuple means the whole document."""
+    paths = set()
+    for extractor in data_extractors:
+        if extractor.omit or extractor.value:
+            continue
+        if extractor.expression:
+            paths.update(expression_paths(extractor.expression))
+        else:
+            paths.add((extractor.field_name,))
+    # Paths under another one add nothing.
+    return frozenset(path for path in paths
+                     if not any(path[:size] in paths for size in range(len(path))))
+
+
+_IDENTIFIER = re.compile(r'[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def format_path(path):
+    "Returns a path as a jmespath-like string, such as 'items[*].name'."
+    parts = []
+    for key in path:
+        if key is ANY:
+            parts.append('[*]')
+            continue
+        if not _IDENTIFIER.match(key):
+            key = json.dumps(key)
+        parts.append('.' + key if parts else key)
+    return ''.join(parts) or '@'
+
+
+def _merge(first, second):
+    if first is None or second is None:
+        return None
+    merged = dict(first)
+    for key, subtree in second.items():
+        merged[key] = _merge(merged[key], subtree) if key in merged else subtree
+    return merged
+
+
+def _complete(tree):
+    # Keys also covered by ANY get the paths of both, so lookups need a
+    # single get.
+    if tree is None:
+        return None
+    any_tree = tree.get(ANY, _MISSING)
+    for key, subtree in list(tree.items()):
+        if key is not ANY and any_tree is not _MISSING:
+            subtree = _merge(subtree, any_tree)
+        tree[key] = _complete(subtree)
+    return tree
+
+
+def build_tree(paths):
+    """Returns the tree of a set of paths: a dict mapping each key to the
+    tree of its value, where None means the whole value."""
+    if () in paths:
+        return None
+    tree = {}
+    for path in sorted(paths, key=len):
+        node = tree
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+            if node is None:
+                break
+        else:
+            node[path[-1]] = None
+    return _complete(tree)
+
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_decoder = json.JSONDecoder()
+
+
+def _skip(text, pos):
+    """Returns the end of the JSON value at pos, dropping its decoded value.
+    The C scanner decodes it several times faster than a Python scanner
+    can skip it, and only one skipped value is held at a time."""
+    return _decoder.raw_decode(text, pos)[1]
+
+
+def _decode(text, pos, tree):
+    if tree is not None:
+        char = text[pos]
+        if char == '{':
+            return _decode_object(text, pos + 1, tree)
+        if char == '[' and ANY in tree:
+            # Items are usually small and alike: decoding the array whole and
+            # pruning it is faster than walking the keys of every item.
+            value, pos = _decoder.raw_decode(text, pos)
+            return _prune(value, tree), pos
+    return _decoder.raw_decode(text, pos)
+
+
+def _decode_object(text, pos, tree):
+    result = {}
+    any_tree = tree.get(ANY, _MISSING)
+    pos = _WHITESPACE.match(text, pos).end()
+    if text[pos] == '}':
+        return result, pos + 1
+    while True:
+        if text[pos] != '"':
+            raise JSONDecodeError("Expecting property name enclosed in double quotes", text, pos)
+        key, pos = scanstring(text, pos + 1)
+        pos = _WHITESPACE.match(text, pos).end()
+        if text[pos] != ':':
+            raise JSONDecodeError("Expecting ':' delimiter", text, pos)
+        pos = _WHITESPACE.match(text, pos + 1).end()
+        subtree = tree.get(key, any_tree)
+        if subtree is _MISSING:
+            pos = _skip(text, pos)
+        else:
+            result[key], pos = _decode(text, pos, subtree)
+        pos = _WHITESPACE.match(text, pos).end()
+        char = text[pos]
+        if char == '}':
+            return result, pos + 1
+        if char != ',':
+            raise JSONDecodeError("Expecting ',' delimiter", text, pos)
+        pos = _WHITESPACE.match(text, pos + 1).end()
+
+
+def _prune(value, tree):
+    if tree is None:
+        return value
+    if isinstance(value, dict):
+        if ANY in tree:
+            any_tree = tree[ANY]
+            return dict((key, _prune(item, tree.get(key, any_tree))) for key, item in value.items())
+        return dict((key, _prune(item, tree[key])) for key, item in value.items() if key in tree)
+    if isinstance(value, list) and ANY in tree:
+        any_tree = tree[ANY]
+        return [_prune(item, any_tree) for item in value]
+    return value
+
+
+class Projection(object):
+    """Reduces documents to a set of input paths.
+
+    `prune` copies the parts of a decoded document that the paths may read;
+    `loads` decodes JSON text into the same reduced document, dropping each
+    other value as soon as it is decoded instead of holding the whole
+    document.
+    """
+
+    def __init__(self, paths):
+        self.paths = frozenset(paths)
+        self.tree = build_tree(self.paths)
+
+    def prune(self, data):
+        "Returns a copy of a decoded document reduced to the paths."
+        return _prune(data, self.tree)
+
+    def loads(self, text):
+        "Decodes a JSON document reduced to the paths."
+        if isinstance(text, bytes):
+            text = text.decode('utf-8')
+        if self.tree is None:
+            return json.loads(text)
+        value, pos = self.raw_decode(text, _WHITESPACE.match(text, 0).end())
+        if _WHITESPACE.match(text, pos).end() != len(text):
+            raise JSONDecodeError("Extra data", text, pos)
+        return value
+
+    def raw_decode(self, text, pos=0):
+        """Same as `json.JSONDecoder.raw_decode`: decodes the reduced
+        document starting at pos and returns it with the position where it
+        ends. Errors are `json.JSONDecodeError` with the same positions."""
+        if self.tree is None:
+            return _decoder.raw_decode(text, pos)
+        try:
+            return _decode(text, pos, self.tree)
+        except IndexError:
+            raise JSONDecodeError("Expecting value", text, len(text))
+
+
+def compile_projection(data_extractors):
+    "Returns the `Projection` of the input paths of a list of data extractors."
+    return Projection(input_paths(data_extractors))
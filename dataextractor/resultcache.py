@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""Cache of extracted records in front of an extraction plan.
+
+Records are identified by a hash of the parts the extractors read, or by a
+key given by the caller such as a webhook delivery id, and plans by a
+fingerprint of their extractor configuration, so a payload received again,
+for instance a retried webhook, returns the stored result without being
+extracted again. Results are kept in a bounded process-local LRU cache with
+a time to live and, optionally, in a Django cache shared by every worker.
+"""
+from __future__ import unicode_literals
+import hashlib
+import json
+import pickle
+import threading
+import time
+from collections import OrderedDict
+import jmespath
+from . import expressions
+from . import plan as plan_module
+from .projection import Projection, input_paths
+from .specs import to_specs
+
+
+DEFAULT_MAXSIZE = 1024
+DEFAULT_TTL = 300
+
+
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def content_hash(data):
+    """Returns a hash of a record. Its pickle is hashed rather than its JSON
+    form, which is the same for {1: x} and {'1': x} or for tuples and lists.
+    Key order counts, since keys() and values() depend on it.
+
+    Equal records may still pickle differently: an object appearing twice
+    is written once and then referenced, so [x, x] and [x, copy(x)] get
+    different hashes. That only costs a cache miss."""
+    return _digest(pickle.dumps(data, protocol=4))
+
+
+def fingerprint(data_extractors):
+    """Returns a hash of the configuration of a list of data extractors and
+    of the versions and backend evaluating them, so a shared cache never
+    returns results extracted by another release."""
+    from . import __version__
+    return _digest(json.dumps([
+        __version__, jmespath.__version__, expressions.get_backend(), to_specs(data_extractors),
+    ]).encode('utf-8'))
+
+
+class ResultCache(object):
+    """Bounded LRU cache of extracted records with a time to live in seconds.
+
+    When `alias` names a Django cache, results missing from this process are
+    looked up there, and new results are stored in both. `ttl` of None keeps
+    the results until they are evicted.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL, alias=None, timer=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.alias = alias
+        self.timer = timer
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _shared_cache(self):
+        if not self.alias:
+            return None
+        from django.core.cache import caches
+        return caches[self.alias]
+
+    def get(self, key):
+        "Returns the result stored under key, or None."
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, result = entry
+                if expires is None or expires > self.timer():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return result
+                del self._entries[key]
+        shared = self._shared_cache()
+        result = None if shared is None else shared.get('dataextractor:result:%s' % key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.shared_hits += 1
+            self._store(key, result)
+        return result
+
+    def set(self, key, result):
+        "Stores a result under key."
+        with self._lock:
+            self._store(key, result)
+        shared = self._shared_cache()
+        if shared is not None:
+            shared.set('dataextractor:result:%s' % key, result, self.ttl)
+
+    def _store(self, key, result):
+        expires = None if self.ttl is None else self.timer() + self.ttl
+        self._entries[key] = (expires, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        """Returns a dict with the counters of the cache. `hit_ratio` counts
+        the hits of the shared cache."""
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hit_ratio': (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        "Forgets the results of this process and resets the counters."
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.shared_hits = self.misses = 0
+
+
+class CachedPlan(object):
+    """Extraction plan of a list of data extractors returning the stored
+    result of records already extracted. Records are hashed on the input
+    paths the extractors read, see `projection.input_paths`, so large
+    payloads cost little more than their read parts. Results are shallow
+    copies of the stored ones: nested values are shared and must not be
+    modified."""
+
+    def __init__(self, data_extractors, cache=None):
+        specs = to_specs(data_extractors)
+        self.plan = plan_module.compile_extractors(specs)
+        self.projection = Projection(input_paths(specs))
+        self.fingerprint = fingerprint(specs)
+        self.cache = ResultCache() if cache is None else cache
+
+    @property
+    def field_names(self):
+        return self.plan.field_names
+
+    def extract(self, data, key=None):
+        """Extracts an ordered dict from data, or returns the stored one.
+        `key` identifies the record instead of its content; it must change
+        whenever the content does."""
+        if key is None:
+            key = content_hash(self.projection.prune(data))
+        key = '%s:%s' % (self.fingerprint, key)
+        result = self.cache.get(key)
+        if result is None:
+            result = self.plan.extract(data)
+            self.cache.set(key, result)
+        return OrderedDict(result)
+
+    def extract_many(self, records, keys=None):
+        "Extracts a list of ordered dicts from many records."
+        if keys is None:
+            return [self.extract(data) for data in records]
+        return [self.extract(data, key) for data, key in zip(records, keys)]
@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"Signals sent by the data extractors."
+from django.dispatch import Signal
+
+
+# Sent after each measured extractor call when instrumentation is enabled
+# with `instrumentation.send_signal` as callback. Arguments: key, elapsed,
+# value and error.
+extractor_measured = Signal()
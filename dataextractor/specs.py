@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"Lightweight runtime representation of data extractors, independent of Django."
+from __future__ import unicode_literals
+import json
+from collections import OrderedDict, namedtuple
+from . import engine
+
+
+FIELDS = ('field_name', 'omit', 'value', 'expression', 'omit_empty', 'output_type')
+
+
+class ExtractorSpec(namedtuple('ExtractorSpec', FIELDS)):
+    """Immutable tuple with the fields of a data extractor.
+
+    Accepted by every extraction function in place of `DataExtractor`
+    instances. It has no per-instance dict, pickles as a plain tuple of
+    values and can be built from dicts or JSON without configuring Django.
+    """
+    __slots__ = ()
+
+    def __new__(cls, field_name, omit=False, value='', expression='', omit_empty=False, output_type=''):
+        return super(ExtractorSpec, cls).__new__(
+            cls, field_name, bool(omit), value or '', expression or '', bool(omit_empty),
+            output_type or '')
+
+    def __str__(self):
+        return self.field_name
+
+    @classmethod
+    def from_dict(cls, data):
+        "Builds a spec from a dict, ignoring unknown keys."
+        return cls(**dict((name, data[name]) for name in FIELDS if name in data))
+
+    @classmethod
+    def from_extractor(cls, extractor):
+        "Builds a spec from any object with the attributes of a data extractor."
+        if isinstance(extractor, cls):
+            return extractor
+        if isinstance(extractor, dict):
+            return cls.from_dict(extractor)
+        compiled = getattr(extractor, 'compiled_expression', None)
+        if compiled:
+            engine.preload(extractor.expression, compiled)
+        return cls(extractor.field_name, extractor.omit, extractor.value, extractor.expression,
+                   extractor.omit_empty, getattr(extractor, 'output_type', ''))
+
+    def to_dict(self):
+        return OrderedDict(zip(FIELDS, self))
+
+    def get_value(self, data):
+        "Extracts data from a data dict."
+        return engine.get_value(self, data)
+
+    def get_data(self, data):
+        "extracts an ordered dict from data parameter."
+        return engine.get_data(self, data)
+
+
+def to_specs(data_extractors):
+    """Converts model instances, dicts or specs into a tuple of
+    `ExtractorSpec`."""
+    return tuple(ExtractorSpec.from_extractor(extractor) for extractor in data_extractors)
+
+
+def load_specs(source):
+    """Returns the specs of a JSON document, given as a string or a file
+    object, holding a list of extractor objects."""
+    if hasattr(source, 'read'):
+        rows = json.load(source)
+    else:
+        rows = json.loads(source)
+    return tuple(ExtractorSpec.from_dict(row) for row in rows)
+
+
+def dump_specs(data_extractors):
+    "Returns the JSON document of a list of data extractors."
+    return json.dumps([spec.to_dict() for spec in to_specs(data_extractors)])
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"Streaming extraction over JSON Lines files and large JSON arrays."
+from __future__ import unicode_literals
+import csv
+import datetime
+import decimal
+import json
+from itertools import islice
+from . import parallel
+from . import plan as plan_module
+
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_CHUNK_SIZE = 64 * 1024
+_WHITESPACE = ' \t\n\r'
+_NUMBER_CHARS = '0123456789.eE+-'
+# Longest token that may be cut by the end of a chunk: an escaped surrogate pair.
+_MAX_TOKEN = 12
+
+
+def iter_json_lines(fp, projection=None):
+    """Yields the records of a JSON Lines file, skipping blank lines. With a
+    `projection.Projection`, records are reduced to its paths."""
+    loads = json.loads if projection is None else projection.loads
+    for line in fp:
+        line = line.strip()
+        if line:
+            yield loads(line)
+
+
+def iter_json_array(fp, chunk_size=DEFAULT_CHUNK_SIZE, projection=None):
+    """Yields the items of a top-level JSON array reading the file in chunks,
+    so only one item has to be held in memory at a time. With a
+    `projection.Projection`, items are decoded reduced to its paths."""
+    decode = json.JSONDecoder().raw_decode if projection is None else projection.raw_decode
+    buffer = ''
+    pos = 0
+    # Characters dropped from the buffer, to report positions in the file.
+    consumed = 0
+    eof = False
+    started = False
+    expect_value = True
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        if pos >= len(buffer):
+            if eof:
+                raise ValueError("Unexpected end of JSON array")
+            chunk = fp.read(chunk_size)
+            eof = not chunk
+            consumed += pos
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        char = buffer[pos]
+        if not started:
+            if char != '[':
+                raise ValueError("Expected a JSON array")
+            started = True
+            pos += 1
+            continue
+        if char == ']':
+            return
+        if not expect_value:
+            if char != ',':
+                raise ValueError("Expected ',' or ']' at position %d" % (consumed + pos))
+            expect_value = True
+            pos += 1
+            continue
+        try:
+            value, end = decode(buffer, pos)
+        except json.JSONDecodeError as error:
+            # Only an error at the end of the buffer may come from an item
+            # cut by it; the others are raised without reading further.
+            if eof or not (error.pos > len(buffer) - _MAX_TOKEN
+                           or error.msg.startswith('Unterminated string')):
+                raise ValueError("%s at position %d" % (error.msg, consumed + error.pos))
+            end = None
+        # A number ending at the end of the buffer or followed by a character
+        # that can continue it may be truncated, wait for more characters.
+        if end is None or (not eof and (end >= len(buffer) or buffer[end] in _NUMBER_CHARS)):
+            # Grow the reads with the pending item so large items are not
+            # parsed again for every chunk.
+            chunk = fp.read(max(chunk_size, len(buffer) - pos))
+            eof = not chunk
+            consumed += pos
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        yield value
+        pos = end
+        expect_value = False
+
+
+def iter_records(fp, input_format='auto', chunk_size=DEFAULT_CHUNK_SIZE, projection=None):
+    """Yields the records of a JSON Lines file or a JSON array file. With the
+    'auto' format the first non blank character decides. With a
+    `projection.Projection`, records are reduced to its paths."""
+    if input_format == 'auto':
+        head = ''
+        while True:
+            char = fp.read(1)
+            if not char or char not in _WHITESPACE:
+                head = char
+                break
+        input_format = 'json' if head == '[' else 'jsonl'
+        fp = _Prepend(head, fp)
+    if input_format == 'json':
+        return iter_json_array(fp, chunk_size=chunk_size, projection=projection)
+    if input_format == 'jsonl':
+        return iter_json_lines(fp, projection=projection)
+    raise ValueError("Unknown input format: %s" % input_format)
+
+
+class _Prepend(object):
+    "File-like object returning some already read text before the file."
+
+    def __init__(self, head, fp):
+        self.head = head
+        self.fp = fp
+
+    def read(self, size=-1):
+        head, self.head = self.head, ''
+        if not head:
+            return self.fp.read(size)
+        if size is None or size < 0:
+            return head + self.fp.read()
+        return head + self.fp.read(size - len(head))
+
+    def __iter__(self):
+        lines = iter(self.fp)
+        head, self.head = self.head, ''
+        if head:
+            yield head + next(lines, '')
+        for line in lines:
+            yield line
+
+
+def iter_batches(records, batch_size=DEFAULT_BATCH_SIZE):
+    "Yields lists of up to batch_size records."
+    records = iter(records)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def extract_stream(data_extractors, records, batch_size=DEFAULT_BATCH_SIZE, workers=None):
+    """Yields the data extracted from each record of an iterable, processing
+    the records in batches of batch_size. With `workers` the batches are
+    extracted in a pool of processes, see `ParallelExtractor`."""
+    if workers is not None:
+        if isinstance(data_extractors, plan_module.ExtractionPlan):
+            raise ValueError("Compiled plans cannot be sent to worker processes.")
+        with parallel.ParallelExtractor(data_extractors, workers, batch_size) as extractor:
+            for row in extractor.extract_stream(records):
+                yield row
+        return
+    if not isinstance(data_extractors, plan_module.ExtractionPlan):
+        data_extractors = plan_module.compile_extractors(data_extractors)
+    for batch in iter_batches(records, batch_size):
+        for row in data_extractors.extract_many(batch):
+            yield row
+
+
+def json_default(value):
+    "Serializes the values returned by the custom functions."
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError("Object of type %s is not JSON serializable" % type(value).__name__)
+
+
+class JSONLinesWriter(object):
+    "Writes rows as JSON Lines, flushing the file every flush_every rows."
+
+    def __init__(self, fp, flush_every=DEFAULT_BATCH_SIZE):
+        self.fp = fp
+        self.flush_every = flush_every
+        self.count = 0
+
+    def write(self, row):
+        self.fp.write(json.dumps(row, default=json_default))
+        self.fp.write('\n')
+        self.count += 1
+        if self.flush_every and self.count % self.flush_every == 0:
+            self.fp.flush()
+
+    def close(self):
+        self.fp.flush()
+
+
+class CSVWriter(JSONLinesWriter):
+    """Writes rows as CSV with a column per field name. Lists and dicts are
+    written as JSON and None as an empty cell."""
+
+    def __init__(self, fp, fieldnames, flush_every=DEFAULT_BATCH_SIZE):
+        super(CSVWriter, self).__init__(fp, flush_every=flush_every)
+        self.fieldnames = list(fieldnames)
+        self.writer = csv.writer(fp)
+        self.writer.writerow(self.fieldnames)
+
+    def write(self, row):
+        self.writer.writerow([self.format_value(row.get(name)) for name in self.fieldnames])
+        self.count += 1
+        if self.flush_every and self.count % self.flush_every == 0:
+            self.fp.flush()
+
+    @staticmethod
+    def format_value(value):
+        if value is None:
+            return ''
+        if isinstance(value, (list, dict)):
+            return json.dumps(value, default=json_default)
+        if isinstance(value, (datetime.date, datetime.time)):
+            return value.isoformat()
+        return value
+
+
+def write_stream(writer, rows):
+    "Writes the rows of an iterable and returns the number of rows written."
+    for row in rows:
+        writer.write(row)
+    writer.close()
+    return writer.count
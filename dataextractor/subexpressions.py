@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"Evaluation of the path prefixes shared by the expressions of an extractor set."
+from __future__ import unicode_literals
+from operator import itemgetter
+from .expressions import get_field, make_pipe_evaluator
+
+
+class SharedPaths(object):
+    """Evaluates a set of paths once per record, following each common
+    prefix a single time.
+
+    Calling the object with a record returns a list of slots: slot 0 holds
+    the record and `slot(path)` gives the slot holding the value of a path.
+    """
+
+    def __init__(self, paths):
+        paths = set(paths)
+        children = {}
+        for path in paths:
+            for size in range(1, len(path) + 1):
+                children.setdefault(path[:size - 1], set()).add(path[:size])
+        # Only the paths themselves and the prefixes where paths diverge get
+        # a slot; the steps in between are followed without storing them.
+        kept = set(paths)
+        kept.update(prefix for prefix, nodes in children.items() if len(nodes) > 1 and prefix)
+        self._slots = {(): 0}
+        self._program = []
+        for path in sorted(kept, key=len):
+            source = path[:-1]
+            while source not in self._slots:
+                source = source[:-1]
+            slot = self._slots[path] = len(self._slots)
+            self._program.append((slot, self._slots[source], path[len(source):]))
+        self._size = len(self._slots)
+        self.lookups = sum(len(steps) for _, _, steps in self._program)
+
+    def slot(self, path):
+        return self._slots[path]
+
+    def __call__(self, data):
+        slots = [None] * self._size
+        slots[0] = data
+        for slot, source, steps in self._program:
+            value = slots[source]
+            for lookup, key in steps:
+                if value is None:
+                    break
+                if type(value) is dict and lookup is get_field:
+                    value = value.get(key)
+                else:
+                    value = lookup(value, key)
+            slots[slot] = value
+        return slots
+
+
+def _path_of(getter):
+    return getattr(getter, 'path', None) or getattr(getter, 'prefix', None)
+
+
+def share_paths(getters):
+    """Looks for path prefixes shared by the given getters. Returns None when
+    sharing them saves nothing, otherwise a (shared_paths, transform) pair:
+    `transform(getter)` returns an equivalent getter that reads the slots
+    returned by `shared_paths(data)` instead of the record."""
+    paths = [_path_of(getter) for getter in getters]
+    paths = [path for path in paths if path]
+    if len(paths) < 2:
+        return None
+    shared = SharedPaths(paths)
+    if shared.lookups >= sum(len(path) for path in paths):
+        return None
+
+    def transform(getter):
+        if getattr(getter, 'path', None):
+            return itemgetter(shared.slot(getter.path))
+        if getattr(getter, 'prefix', None):
+            return make_pipe_evaluator(itemgetter(shared.slot(getter.prefix)), getter.rest)
+        return lambda slots: getter(slots[0])
+    return shared, transform
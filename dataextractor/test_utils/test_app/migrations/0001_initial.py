@@ -0,0 +1,30 @@
+# Generated by Django 3.0.14 on 2026-10-18 07:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Extractor',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field_name', models.CharField(max_length=60, verbose_name='Input name')),
+                ('omit', models.BooleanField(blank=True, default=False, verbose_name='Omit')),
+                ('value', models.TextField(blank=True, default='', verbose_name='Default value')),
+                ('expression', models.CharField(blank=True, default='', max_length=250, verbose_name='Expression')),
+                ('omit_empty', models.BooleanField(blank=True, default=False, verbose_name='Exclude if empty')),
+            ],
+            options={
+                'verbose_name': 'Data extractor',
+                'verbose_name_plural': 'Data extractors',
+                'abstract': False,
+            },
+        ),
+    ]
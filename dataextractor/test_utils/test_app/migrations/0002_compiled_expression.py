@@ -0,0 +1,18 @@
+# Generated by Django 3.0.14 on 2026-10-18 08:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='extractor',
+            name='compiled_expression',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Compiled expression'),
+        ),
+    ]
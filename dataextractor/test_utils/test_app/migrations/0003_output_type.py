@@ -0,0 +1,18 @@
+# Generated by Django 3.0.14 on 2026-10-18 08:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0002_compiled_expression'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='extractor',
+            name='output_type',
+            field=models.CharField(blank=True, choices=[('int', 'Integer'), ('float', 'Float'), ('decimal', 'Decimal'), ('bool', 'Boolean'), ('date', 'Date'), ('datetime', 'Date and time'), ('str', 'Text'), ('json', 'JSON')], default='', max_length=10, verbose_name='Output type'),
+        ),
+    ]
@@ -1,3 +1,9 @@
 from django.db import models
 
+from dataextractor.models import DataExtractor
+
 # Put your test models here
+
+
+class Extractor(DataExtractor):
+    "Concrete data extractor used by the tests."
@@ -31,5 +31,15 @@ urlpatterns = [
         regex="^DataExtractor/$",
         view=views.DataExtractorListView.as_view(),
         name='DataExtractor_list',
+    ),
+    url(
+        regex="^DataExtractor/(?P<model>[\w.]+)/~export/$",
+        view=views.DataExtractorExportView.as_view(),
+        name='DataExtractor_export',
+    ),
+    url(
+        regex="^DataExtractor/(?P<model>[\w.]+)/~import/$",
+        view=views.DataExtractorImportView.as_view(),
+        name='DataExtractor_import',
     ),
 	]
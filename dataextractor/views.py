@@ -1,14 +1,20 @@
 # -*- coding: utf-8 -*-
+import io
+from django.contrib.auth.mixins import PermissionRequiredMixin
+from django.http import Http404, HttpResponse, JsonResponse
 from django.views.generic import (
     CreateView,
     DeleteView,
     DetailView,
     UpdateView,
-    ListView
+    ListView,
+    View,
 )
 
+from . import bulk
 from .models import (
 	DataExtractor,
+	get_extractor_model,
 )
 
 
@@ -36,3 +42,65 @@ class DataExtractorListView(ListView):
 
     model = DataExtractor
 
+
+
+BULK_CONTENT_TYPES = {
+    'json': 'application/json',
+    'yaml': 'application/x-yaml',
+    'csv': 'text/csv',
+}
+
+
+class DataExtractorBulkMixin(PermissionRequiredMixin):
+    "Resolves the concrete data extractor model named in the URL."
+
+    raise_exception = True
+    actions = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            self.model = get_extractor_model(kwargs['model'])
+        except (LookupError, ValueError):
+            raise Http404("Unknown data extractor model.")
+        return super(DataExtractorBulkMixin, self).dispatch(request, *args, **kwargs)
+
+    def get_permission_required(self):
+        opts = self.model._meta
+        return ['%s.%s_%s' % (opts.app_label, action, opts.model_name) for action in self.actions]
+
+    def get_format(self):
+        file_format = self.request.GET.get('format', 'json')
+        if file_format not in bulk.FORMATS:
+            raise Http404("Unknown format.")
+        return file_format
+
+
+class DataExtractorExportView(DataExtractorBulkMixin, View):
+    "Returns all the extractors of a model as JSON, YAML or CSV."
+
+    actions = ('view',)
+
+    def get(self, request, *args, **kwargs):
+        file_format = self.get_format()
+        document = bulk.export_extractors(self.model._default_manager.all(), file_format)
+        return HttpResponse(document, content_type=BULK_CONTENT_TYPES[file_format])
+
+
+class DataExtractorImportView(DataExtractorBulkMixin, View):
+    """Creates and updates the extractors of a model from the JSON, YAML or
+    CSV document in the request body or in the uploaded `file`. Responds
+    with the number of created and updated rows and the errors of the
+    skipped ones."""
+
+    actions = ('add', 'change')
+
+    def post(self, request, *args, **kwargs):
+        file_format = self.get_format()
+        upload = request.FILES.get('file')
+        content = upload.read() if upload is not None else request.body
+        try:
+            rows = bulk.read_rows(io.StringIO(content.decode('utf-8')), file_format)
+        except ValueError as error:
+            return JsonResponse({'error': str(error)}, status=400)
+        result = bulk.import_extractors(self.model, rows)
+        return JsonResponse(result.as_dict())
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8
+from __future__ import unicode_literals, absolute_import
+
+import argparse
+import json
+import os
+import sys
+
+import django
+
+
+def run_benchmarks(argv):
+    parser = argparse.ArgumentParser(description="Runs the extraction benchmarks and prints JSON results.")
+    parser.add_argument('--records', type=int, default=100, help="Payloads per configuration.")
+    parser.add_argument('--repeat', type=int, default=3, help="Passes over the payloads.")
+    parser.add_argument('--counts', type=int, nargs='+', default=[10, 100, 1000],
+                        help="Numbers of extractors.")
+    parser.add_argument('--sizes', nargs='+', default=['small', 'medium', 'large'],
+                        choices=['small', 'medium', 'large'], help="Payload sizes.")
+    parser.add_argument('--kinds', nargs='+', default=['plain', 'nested', 'functions'],
+                        choices=['plain', 'nested', 'functions'], help="Kinds of expressions.")
+    parser.add_argument('--quick', action='store_true',
+                        help="Small run: 20 records, 1 pass, 10 and 100 extractors.")
+    parser.add_argument('--output', '-o', help="File receiving the JSON results.")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.records, args.repeat, args.counts = 20, 1, [10, 100]
+
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'tests.settings'
+    django.setup()
+    from dataextractor import benchmark
+    from dataextractor.test_utils.test_app.models import Extractor
+
+    results = benchmark.run(Extractor, records=args.records, repeat=args.repeat, counts=args.counts,
+                            sizes=args.sizes, kinds=args.kinds)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as fp:
+            fp.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    run_benchmarks(sys.argv[1:])
@@ -56,21 +56,26 @@ setup(
         'dataextractor',
     ],
     include_package_data=True,
-    install_requires=["jmespath>=0.9.4",],
+    python_requires='>=3.7',
+    install_requires=["Django>=2.2", "jmespath>=0.9.4",],
+    extras_require={
+        'yaml': ["PyYAML>=5.1"],
+        'frames': ["numpy", "pandas"],
+        'arrow': ["pyarrow"],
+    },
     license="MIT",
     zip_safe=False,
     keywords='dj-data-extractor',
     classifiers=[
         'Development Status :: 3 - Alpha',
-        'Framework :: Django :: 1.11',
-        'Framework :: Django :: 2.1',
+        'Framework :: Django :: 2.2',
+        'Framework :: Django :: 3.0',
         'Intended Audience :: Developers',
         'License :: OSI Approved :: BSD License',
         'Natural Language :: English',
-        'Programming Language :: Python :: 2',
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
     ],
 )
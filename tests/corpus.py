@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""Expressions and payloads shared by the differential tests, which check
+that another way of evaluating or reducing gives the same results."""
+
+
+CORPUS = [
+    "a", "a.b.c", "a[0]", "a[-1].b", "a[1:3]", "a[::-1]", "a[*].b", "a[].b", "a[]", "*.b",
+    "a[?b > `1`].b", "a[?b == 'x']", "a[?!b]", "a[?b != `null`] | length(@)", "{x: a, y: b.c}",
+    "[a, b]", "a || b", "a && b", "!a", "!`0`", "a == `1`", "a < b", "`[1, 2]`", "'raw'", "@",
+    "a | [0]", "b.c | to_string(@)", "sort_by(a, &b)", "max_by(a, &b)", "map(&b, a)", "length(a)",
+    "keys(@)", "not_null(x, a, b)", "date(s, '%Y-%m-%d')", "datetime(s, '%Y-%m-%dT%H:%M:%S')",
+    "format(n, '{:05d}')", "format(s, '{}')", "if(flag, a, b)", "if(a, `1`, `2`)",
+    "json(doc).value", "json(doc) | keys(@)", "length(`1`)", "unknown(a)", "date(s)", "upper(s)",
+    "if(flag, json(doc).value, date(s, '%Y'))", "if(flag)", "coalesce(x, a, b)", "coalesce(x)",
+    "default(x, b)", "default(a, json(s))", "coalesce(x, json(s))", "a.b", "a[0].b", "a[-1]",
+    "a[1:].b", "a[*].b.c", "a[?b > `1`].c", "a[?c].b", "a[*].b | [0]", "[a.b, c]", "{x: a.b, y: c}",
+    "a.b || c", "a && c.d", "!a.b", "coalesce(x.y, a.b)", "if(flag, a[0].b, c)",
+    "default(c.d, 'x')", "not_null(x, c).d",
+]
+
+PAYLOADS = [
+    {},
+    None,
+    [1, 2, 3],
+    "text",
+    [1, {"b": 2}],
+    {"a": 1, "b": 2, "n": 7, "flag": True},
+    {"a": [{"b": 1}, {"b": 3}, {"b": 2}], "b": {"c": "x"}, "flag": False},
+    {"a": [{"b": "x"}, {"b": None}, {}], "s": "2020-01-02", "doc": '{"value": [1, 2]}'},
+    {"a": [[1, 2], [3], 4], "s": "2020-01-02T03:04:05", "n": 0},
+    {"a": {"p": {"b": 1}, "q": {"b": 2}}, "b": {"c": 0}, "x": None},
+    {"a": "", "b": [], "flag": 0},
+    {"a": {"b": 1, "c": [1, 2]}, "c": {"d": {}, "e": 2}, "flag": True},
+    {"a": [{"b": 1, "c": 2}, {"b": 3, "z": [1]}, {}], "c": [1], "x": {"y": None}},
+    {"a": [[{"b": 1}], {"b": 2, "c": 0}, []], "c": "", "flag": False, "doc": '{"value": 1}'},
+    {"a": {"p": {"b": {"c": 1}}, "q": {"b": []}}, "c": {"d": None}, "x": {"y": 2, "z": 3}},
+]
+
+
+def evaluate(function, payload):
+    "Returns the value or the type of the error of function(payload)."
+    try:
+        return ('value', function(payload))
+    except Exception as error:
+        return ('error', type(error))
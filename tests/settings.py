@@ -31,6 +31,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
 
     'dataextractor',
+    'dataextractor.test_utils.test_app',
     
 
     # if your app has other dependencies that need to be added to the site
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_dj-data-extractor
+------------
+
+Tests for `dj-data-extractor` aio module.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.test import TestCase
+from dataextractor import aio, models
+from dataextractor import plan as plan_module
+from dataextractor.managers import compiled_extractors
+from dataextractor.test_utils.test_app.models import Extractor
+
+
+async def _records(count):
+    for index in range(count):
+        yield {"id": index}
+
+
+class TestAsyncExtraction(TestCase):
+
+    def setUp(self):
+        # Changes are not committed, so cached plans are never invalidated.
+        compiled_extractors.clear()
+        Extractor.objects.create(field_name="a", expression="id")
+        Extractor.objects.create(field_name="b", value="constant")
+
+    def test_amerge_data_extractors(self):
+        "querysets are loaded asynchronously and extracted in the executor."
+        async def run():
+            return await aio.amerge_data_extractors(Extractor.objects.order_by('pk'), {"id": 1})
+        self.assertEqual(async_to_sync(run)(), OrderedDict([['a', 1], ['b', 'constant']]))
+
+    def test_querysets_use_cached_plan(self):
+        "querysets are compiled once and then served from the plan cache."
+        async def run():
+            queryset = Extractor.objects.order_by('pk')
+            rows = [await aio.amerge_data_extractors(queryset, {"id": 1})]
+            rows.extend([row async for row in aio.aextract_stream(queryset, _records(2))])
+            return rows
+        compile_extractors = plan_module.compile_extractors
+        with mock.patch.object(plan_module, 'compile_extractors', wraps=compile_extractors) as compiled:
+            rows = async_to_sync(run)()
+        self.assertEqual([row['a'] for row in rows], [1, 0, 1])
+        self.assertEqual(compiled.call_count, 1)
+
+    def test_amerge_bounded(self):
+        "at most DEFAULT_MAX_PENDING merges run in the executor at a time."
+        plan = models.DataExtractor.compile_extractors([models.DataExtractor(field_name="a", expression="id")])
+        extract = plan_module.ExtractionPlan.extract
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def slow_extract(self, data):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+            return extract(self, data)
+
+        async def run(executor):
+            merges = [aio.amerge_data_extractors(plan, {"id": i}, executor) for i in range(20)]
+            return await asyncio.gather(*merges)
+        with ThreadPoolExecutor(max_workers=20) as executor, \
+                mock.patch.object(plan_module.ExtractionPlan, 'extract', slow_extract):
+            rows = async_to_sync(run)(executor)
+        self.assertEqual([row['a'] for row in rows], list(range(20)))
+        self.assertEqual(running[1], aio.DEFAULT_MAX_PENDING)
+
+    def test_aextract_stream(self):
+        "async streams keep the order of the records."
+        async def run():
+            rows = aio.aextract_stream(Extractor.objects.order_by('pk'), _records(25),
+                                       batch_size=4, max_pending=2)
+            return [row['a'] async for row in rows]
+        self.assertEqual(async_to_sync(run)(), list(range(25)))
+
+    def test_process_pool(self):
+        "batches can run in a process pool."
+        extractors = [models.DataExtractor(field_name="a", expression="id")]
+
+        async def run(executor):
+            extractor = aio.AsyncExtractor(extractors, executor=executor, batch_size=3)
+            first = await extractor.extract({"id": 1})
+            rows = [row['a'] async for row in extractor.extract_stream([{"id": i} for i in range(10)])]
+            return first, rows
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            first, rows = async_to_sync(run)(executor)
+        self.assertEqual(first, OrderedDict([['a', 1]]))
+        self.assertEqual(rows, list(range(10)))
+
+    def test_acompiled(self):
+        "acompiled returns the cached plan of the queryset."
+        async def run():
+            return await Extractor.objects.order_by('pk').acompiled()
+        self.assertEqual(async_to_sync(run)().field_names, ('a', 'b'))
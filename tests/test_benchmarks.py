@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_dj-data-extractor
+------------
+
+Micro benchmarks for `dj-data-extractor` optimisations. The number of
+iterations can be raised with the DATAEXTRACTOR_BENCH_N environment
+variable.
+"""
+
+import datetime
+import os
+import sys
+import timeit
+import json
+import jmespath
+from jmespath import visitor
+from django.test import SimpleTestCase
+from dataextractor import benchmark, expressions, functions, resultcache
+from dataextractor.specs import ExtractorSpec
+from dataextractor.test_utils.test_app.models import Extractor
+
+
+ITERATIONS = int(os.environ.get('DATAEXTRACTOR_BENCH_N', 20000))
+
+
+class BenchmarkTestCase(SimpleTestCase):
+
+    def assertFaster(self, name, baseline, optimised, number=ITERATIONS, calls_per_run=1):
+        "times both callables and checks the optimised one is faster."
+        baseline_time = min(timeit.repeat(baseline, number=number, repeat=3))
+        optimised_time = min(timeit.repeat(optimised, number=number, repeat=3))
+        sys.stderr.write("\n%s: %d calls, %.4fs -> %.4fs (x%.1f) " % (
+            name, number * calls_per_run, baseline_time, optimised_time, baseline_time / optimised_time))
+        self.assertLess(optimised_time, baseline_time)
+
+
+class TestAccessorBenchmark(BenchmarkTestCase):
+
+    def test_dotted_path(self):
+        "direct accessors beat jmespath.search on dotted paths."
+        data = {"foo": {"bar": {"baz": [1, 2, 3]}}}
+        accessor = expressions.compile_evaluator("foo.bar.baz[0]")
+        self.assertEqual(accessor(data), jmespath.search("foo.bar.baz[0]", data))
+        self.assertFaster("foo.bar.baz[0]",
+            lambda: jmespath.search("foo.bar.baz[0]", data),
+            lambda: accessor(data))
+
+    def test_plain_field(self):
+        "direct accessors beat jmespath.search on plain fields."
+        data = {"value1": 1}
+        accessor = expressions.compile_evaluator("value1")
+        self.assertFaster("value1",
+            lambda: jmespath.search("value1", data),
+            lambda: accessor(data))
+
+
+class TestDateBenchmark(BenchmarkTestCase):
+
+    def test_datetime_conversions(self):
+        """cached and ISO parsing beat strptime on repeated timestamps. Run
+        with DATAEXTRACTOR_BENCH_N=1000000 for the 1M conversions figure."""
+        values = ["2020-01-%02dT%02d:00:00" % (day, hour) for day in range(1, 29) for hour in range(24)]
+        date_format = "%Y-%m-%dT%H:%M:%S"
+        convert = functions.Functions()._func_datetime
+        strptime = datetime.datetime.strptime
+
+        def baseline():
+            for value in values:
+                strptime(value, date_format)
+
+        def optimised():
+            for value in values:
+                convert(value, date_format)
+
+        self.assertFaster("datetime()", baseline, optimised,
+            number=max(ITERATIONS // len(values), 1), calls_per_run=len(values))
+
+
+class TestFormatBenchmark(BenchmarkTestCase):
+
+    def test_date_formatting(self):
+        "cached and ISO formatting beat strftime on repeated dates."
+        values = [datetime.date(2020, month, day) for month in range(1, 13) for day in range(1, 29)]
+        fmt = "%Y-%m-%d"
+        format_value = functions.Functions()._func_format
+
+        def baseline():
+            for value in values:
+                value.strftime(fmt)
+
+        def optimised():
+            for value in values:
+                format_value(value, fmt)
+
+        self.assertFaster("format()", baseline, optimised,
+            number=max(ITERATIONS // len(values), 1), calls_per_run=len(values))
+
+
+class TestResultCacheBenchmark(BenchmarkTestCase):
+
+    def test_repeated_payloads(self):
+        "cached results beat extracting a large retried payload again."
+        specs = [
+            ExtractorSpec("id"),
+            ExtractorSpec("created", expression="datetime(created, '%Y-%m-%dT%H:%M:%S')"),
+            ExtractorSpec("top", expression="sort_by(items[?price > `50`], &price)[-5:].sku"),
+            ExtractorSpec("total", expression="sum(items[*].price)"),
+            ExtractorSpec("status", expression="json(payload).status"),
+        ]
+        payload = {
+            "id": 1, "created": "2020-01-02T03:04:05", "blob": "x" * 50000,
+            "history": [{"k": i, "v": "text %d" % i} for i in range(1500)],
+            "items": [{"sku": "s%d" % i, "price": i % 97, "meta": {"d": "lorem " * 5}} for i in range(300)],
+            "payload": json.dumps({"status": "ok", "lines": list(range(200))}),
+        }
+        cached = resultcache.CachedPlan(specs)
+        self.assertEqual(cached.extract(payload), cached.plan.extract(payload))
+        number = max(ITERATIONS // 100, 1)
+        self.assertFaster("result cache", lambda: cached.plan.extract(payload),
+            lambda: cached.extract(payload), number=number)
+        self.assertFaster("result cache by key", lambda: cached.plan.extract(payload),
+            lambda: cached.extract(payload, key="delivery-1"), number=number)
+
+
+class TestBackendBenchmark(BenchmarkTestCase):
+
+    def test_closures_backend(self):
+        "closures beat the interpreter on filters, projections and function calls."
+        expression = "items[?price > `10`].name | sort(@) | join(', ', @)"
+        data = {"items": [{"name": "item %d" % i, "price": i} for i in range(20)]}
+        interpreter = expressions.compile_evaluator(expression, backend='interpreter')
+        closures = expressions.compile_evaluator(expression, backend='closures')
+        self.assertEqual(closures(data), interpreter(data))
+        self.assertFaster("closures backend", lambda: interpreter(data), lambda: closures(data),
+            number=max(ITERATIONS // 10, 1))
+
+
+class TestLazyIfBenchmark(BenchmarkTestCase):
+
+    def test_heavy_branches(self):
+        "lazy if() skips the discarded branch that an eager call decodes."
+        expression = "if(flag, summary, json(document) | length(items))"
+        document = json.dumps({"items": [{"id": i, "tags": ["a", "b"]} for i in range(200)]})
+        data = {"flag": True, "summary": "short", "document": document}
+        parsed = expressions.compile_expression(expression).parsed
+        eager = visitor.TreeInterpreter(expressions.options)
+        lazy = expressions.compile_evaluator(expression)
+        self.assertEqual(lazy(data), eager.visit(parsed, data))
+        self.assertFaster("lazy if()", lambda: eager.visit(parsed, data), lambda: lazy(data),
+            number=max(ITERATIONS // 10, 1))
+
+
+class TestBenchmarkSuite(SimpleTestCase):
+
+    def test_run(self):
+        "the benchmark suite returns a result per target and configuration."
+        results = benchmark.run(Extractor, records=2, repeat=1, counts=[3], sizes=['small'])
+        self.assertEqual(len(results['results']), 3 * len(benchmark.DEFAULT_TARGETS))
+        for result in results['results']:
+            self.assertGreater(result['records_per_sec'], 0)
+            self.assertLessEqual(result['p50_us'], result['p99_us'])
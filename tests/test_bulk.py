@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_dj-data-extractor
+------------
+
+Tests for `dj-data-extractor` bulk module.
+"""
+
+import io
+import json
+import os
+import shutil
+import tempfile
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from dataextractor import bulk
+from dataextractor.managers import compiled_extractors
+from dataextractor.test_utils.test_app.models import Extractor
+
+
+class TestBulk(TestCase):
+
+    def setUp(self):
+        self.existing = Extractor.objects.create(field_name="old", expression="old")
+
+    def test_import_reports_row_errors(self):
+        "valid rows are written and invalid ones reported without aborting the batch."
+        rows = [
+            {"field_name": "a", "expression": "value1"},
+            {"field_name": "b", "expression": "value1 |"},
+            {"id": self.existing.pk, "field_name": "old", "expression": "new", "omit_empty": "true"},
+            {"field_name": "", "omit": "maybe"},
+            {"id": 9999, "field_name": "c"},
+        ]
+        result = bulk.import_extractors(Extractor, rows)
+        self.assertEqual((result.created, result.updated), (1, 1))
+        self.assertEqual([error.index for error in result.errors], [1, 3, 4])
+        self.assertEqual(sorted(result.errors[1].errors), ['field_name', 'omit'])
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.expression, self.existing.omit_empty), ("new", True))
+        self.assertEqual(list(Extractor.objects.order_by('pk').values_list('field_name', flat=True)),
+                         ["old", "a"])
+
+    def test_update_keeps_missing_fields(self):
+        "updates only change the fields present in the row."
+        self.existing.omit_empty = True
+        self.existing.save()
+        result = bulk.import_extractors(Extractor, [{"id": self.existing.pk, "field_name": "x", "omit": "true"}])
+        self.assertEqual((result.created, result.updated, result.errors), (0, 1, []))
+        self.existing.refresh_from_db()
+        self.assertEqual(
+            (self.existing.field_name, self.existing.omit, self.existing.expression, self.existing.omit_empty),
+            ("x", True, "old", True))
+        self.assertTrue(self.existing.compiled_expression)
+
+    def test_import_checks_constants(self):
+        "constant values that do not match their output type are row errors."
+        rows = [{"field_name": "n", "value": "abc", "output_type": "int"},
+                {"field_name": "m", "value": "12", "output_type": "int"}]
+        result = bulk.import_extractors(Extractor, rows)
+        self.assertEqual(result.created, 1)
+        self.assertEqual([error.index for error in result.errors], [0])
+        self.assertEqual(list(result.errors[0].errors), ['value'])
+
+    def test_round_trip(self):
+        "exported documents import back unchanged in every format."
+        Extractor.objects.create(field_name="b", value="constant", omit=True)
+        exported = bulk.export_rows(Extractor.objects.all())
+        for file_format in bulk.FORMATS:
+            document = bulk.export_extractors(Extractor.objects.all(), file_format)
+            rows = bulk.read_rows(io.StringIO(document), file_format)
+            result = bulk.import_extractors(Extractor, rows)
+            self.assertEqual((result.created, result.updated, result.errors), (0, 2, []))
+            self.assertEqual(bulk.export_rows(Extractor.objects.all()), exported)
+
+    def test_commands(self):
+        "the commands export and import files, guessing their format."
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'extractors.csv')
+        call_command('export_extractors', 'test_app.Extractor', output=path)
+        with open(path) as fp:
+            self.assertEqual(fp.readline().strip(), ",".join(bulk.EXPORT_FIELDS))
+        path = os.path.join(directory, 'extractors.yaml')
+        with open(path, 'w') as fp:
+            fp.write("- field_name: a\n  expression: value1\n- field_name: b\n  expression: '|'\n")
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command('import_extractors', 'test_app.Extractor', path, stdout=stdout, stderr=stderr)
+        self.assertEqual(stdout.getvalue().strip(), "1 created, 0 updated, 1 skipped.")
+        self.assertIn("Row 1: expression", stderr.getvalue())
+
+    def test_views(self):
+        "the endpoints require permissions and exchange documents."
+        url = reverse('dataextractor:DataExtractor_import', kwargs={'model': 'test_app.Extractor'})
+        body = json.dumps([{"field_name": "a"}, {"field_name": "b", "expression": "["}])
+        response = self.client.post(url, body, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+        response = self.client.post(url, body, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 1)
+        self.assertEqual([error['row'] for error in response.json()['errors']], [1])
+        response = self.client.post(url, "{", content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        url = reverse('dataextractor:DataExtractor_export', kwargs={'model': 'test_app.Extractor'})
+        response = self.client.get(url, {'format': 'json'})
+        self.assertEqual([row['field_name'] for row in json.loads(response.content.decode())], ["old", "a"])
+        response = self.client.get(reverse('dataextractor:DataExtractor_export', kwargs={'model': 'auth.User'}))
+        self.assertEqual(response.status_code, 404)
+
+
+class TestImportInvalidation(TransactionTestCase):
+
+    @override_settings(DATAEXTRACTOR_CACHE='default')
+    def test_shared_cache(self):
+        "imports invalidate the shared plans when their transaction commits."
+        compiled_extractors.clear()
+        cache.clear()
+        Extractor.objects.create(field_name="a", expression="value1")
+        self.assertEqual(Extractor.objects.order_by('pk').compiled().field_names, ('a',))
+        version = compiled_extractors.get_version(Extractor)
+        with transaction.atomic():
+            bulk.import_extractors(Extractor, [{"field_name": "b", "value": "x"}])
+            self.assertEqual(compiled_extractors.get_version(Extractor), version)
+        self.assertNotEqual(compiled_extractors.get_version(Extractor), version)
+        # Another worker process with an empty local cache.
+        compiled_extractors._plans.clear()
+        self.assertEqual(Extractor.objects.order_by('pk').compiled().field_names, ('a', 'b'))
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_dj-data-extractor
+------------
+
+Tests for `dj-data-extractor` codegen module.
+"""
+
+from django.test import SimpleTestCase, override_settings
+from dataextractor import codegen, expressions, models
+from tests.corpus import CORPUS, PAYLOADS, evaluate
+
+
+class TestCodegen(SimpleTestCase):
+
+    def test_same_result_as_interpreter(self):
+        "the closures backend returns the same values and errors as the interpreter."
+        for expression in CORPUS:
+            interpreter = expressions.compile_evaluator(expression, backend='interpreter')
+            closures = expressions.compile_evaluator(expression, backend='closures')
+            for payload in PAYLOADS:
+                self.assertEqual(evaluate(closures, payload), evaluate(interpreter, payload),
+                                 (expression, payload))
+
+    def test_unknown_node(self):
+        "nodes without a compiler raise ValueError naming their type."
+        with self.assertRaisesMessage(ValueError, "Unknown expression node type 'unknown'."):
+            codegen.compile_node({"type": "unknown", "children": []}, None)
+
+    def test_setting_selects_backend(self):
+        "DATAEXTRACTOR_BACKEND selects the backend of cached evaluators."
+        expression = "a[?b > `1`].b"
+        self.assertEqual(expressions.get_backend(), 'interpreter')
+        with override_settings(DATAEXTRACTOR_BACKEND='closures'):
+            self.assertEqual(expressions.get_backend(), 'closures')
+            extractor = models.DataExtractor(field_name="a", expression=expression)
+            plan = models.DataExtractor.compile_extractors([extractor])
+            self.assertEqual(plan.extract({"a": [{"b": 1}, {"b": 3}, {"b": 2}]})["a"], [3, 2])
+        self.assertEqual(expressions.get_backend(), 'interpreter')
+        with override_settings(DATAEXTRACTOR_BACKEND='bytecode'):
+            with self.assertRaises(ValueError):
+                expressions.compile_evaluator(expression)
+        expressions.reset_backend()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_dj-data-extractor
+------------
+
+Tests for `dj-data-extractor` coercion module.
+"""
+
+import datetime
+import decimal
+from collections import OrderedDict
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase
+from dataextractor import coercion, models
+from dataextractor.plan import compile_extractors
+from dataextractor.test_utils.test_app.models import Extractor
+
+
+class TestCoercion(SimpleTestCase):
+
+    def tearDown(self):
+        coercion.errors.reset()
+
+    def test_coercers(self):
+        "each output type converts the usual representations of its values."
+        cases = [
+            ('int', "12", 12), ('int', 3.0, 3), ('int', True, 1),
+            ('float', "1.5", 1.5), ('float', 2, 2.0),
+            ('decimal', 0.1, decimal.Decimal("0.1")), ('decimal', " 2.50 ", decimal.Decimal("2.50")),
+            ('bool', "yes", True), ('bool', "0", False), ('bool', 0, False),
+            ('date', "2020-01-02", datetime.date(2020, 1, 2)),
+            ('date', datetime.datetime(2020, 1, 2, 3), datetime.date(2020, 1, 2)),
+            ('datetime', "2020-01-02 03:04:05", datetime.datetime(2020, 1, 2, 3, 4, 5)),
+            ('datetime', "2020-01-02", datetime.datetime(2020, 1, 2)),
+            ('str', 12, "12"), ('str', [1], "[1]"), ('str', datetime.date(2020, 1, 2), "2020-01-02"),
+            ('json', '{"a": 1}', {"a": 1}), ('json', [1], [1]),
+        ]
+        for output_type, value, expected in cases:
+            self.assertEqual(coercion.get_coercer(output_type)(value), expected, (output_type, value))
+        for output_type, value in [('int', 1.5), ('int', "x"), ('bool', "maybe"), ('date', 3),
+                                   ('decimal', "x"), ('datetime', "2020"), ('json', "{")]:
+            with self.assertRaises((TypeError, ValueError), msg=(output_type, value)):
+                coercion.get_coercer(output_type)(value)
+
+    def test_same_output_and_error_counts(self):
+        "plans and merge_data_extractors coerce alike, counting errors instead of raising."
+        extractors = [
+            models.DataExtractor(field_name="a", expression="a", output_type='int'),
+            models.DataExtractor(field_name="b", value="2.5", output_type='decimal'),
+            models.DataExtractor(field_name="c", value="oops", output_type='int'),
+            models.DataExtractor(field_name="d", expression="d", output_type='date', omit_empty=True),
+            models.DataExtractor(field_name="e", expression="e"),
+        ]
+        records = [
+            {"a": "1", "d": "2020-01-02", "e": "1"},
+            {"a": "x", "d": "bad"},
+            {"a": None},
+        ]
+        expected = [
+            OrderedDict([("a", 1), ("b", decimal.Decimal("2.5")), ("c", "oops"),
+                         ("d", datetime.date(2020, 1, 2)), ("e", "1")]),
+            OrderedDict([("a", None), ("b", decimal.Decimal("2.5")), ("c", "oops"), ("e", None)]),
+            OrderedDict([("a", None), ("b", decimal.Decimal("2.5")), ("c", "oops"), ("e", None)]),
+        ]
+        plan = compile_extractors(extractors)
+        # The constant is coerced once, when the plan is compiled.
+        self.assertEqual(coercion.errors.as_dict(), {"c": 1})
+        self.assertEqual(plan.extract_many(records), expected)
+        self.assertEqual(coercion.errors.as_dict(), {"a": 1, "c": 1, "d": 1})
+        coercion.errors.reset()
+        self.assertEqual([models.DataExtractor.merge_data_extractors(extractors, record)
+                          for record in records], expected)
+        self.assertEqual(coercion.errors.as_dict(), {"a": 1, "c": 3, "d": 1})
+
+    def test_clean_rejects_constants(self):
+        "constants that cannot be coerced to the output type fail validation."
+        with self.assertRaises(ValidationError):
+            Extractor(field_name="a", value="x", output_type='int').full_clean()
+        Extractor(field_name="a", value="12", output_type='int').full_clean()
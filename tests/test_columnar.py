@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_dj-data-extractor
+------------
+
+Tests for `dj-data-extractor` columnar module.
+"""
+
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from dataextractor import models
+from dataextractor.test_utils.test_app.models import Extractor
+
+try:
+    import pyarrow
+    import pyarrow.feather
+    import pyarrow.parquet
+    from dataextractor import columnar
+except ImportError:
+    pyarrow = None
+
+
+def make_records(count):
+    for index in range(count):
+        yield {
+            "id": index,
+            "price": index * 0.5,
+            "day": "2020-01-%02d" % (index % 28 + 1),
+            "note": None if index < 5 else index,
+        }
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+class TestArrowWriter(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.extractors = [
+            models.DataExtractor(field_name="id"),
+            models.DataExtractor(field_name="price"),
+            models.DataExtractor(field_name="day", expression="date(day, '%Y-%m-%d')"),
+            models.DataExtractor(field_name="note"),
+        ]
+
+    def test_parquet_batches(self):
+        "records are written in batches with a schema inferred from the first values."
+        path = os.path.join(self.directory, 'out.parquet')
+        count = columnar.write_columnar(self.extractors, make_records(23), path, batch_size=6)
+        self.assertEqual(count, 23)
+        parquet = pyarrow.parquet.ParquetFile(path)
+        self.assertEqual(parquet.metadata.num_row_groups, 4)
+        self.assertEqual(parquet.schema_arrow.names, ["id", "price", "day", "note"])
+        self.assertEqual(parquet.schema_arrow.field("day").type, pyarrow.date32())
+        self.assertEqual(parquet.schema_arrow.field("note").type, pyarrow.int64())
+        table = parquet.read()
+        self.assertEqual(table.column("id").to_pylist(), list(range(23)))
+        self.assertEqual(table.column("day").to_pylist()[0], datetime.date(2020, 1, 1))
+        self.assertEqual(table.column("note").to_pylist()[4:7], [None, 5, 6])
+
+    def test_types_do_not_change(self):
+        "values of another type raise unless the output type is declared."
+        path = os.path.join(self.directory, 'out.parquet')
+        records = [{"price": 1}, {"price": 2.5}, {"price": None}]
+        with self.assertRaises(ValueError):
+            columnar.write_columnar([models.DataExtractor(field_name="price")], records, path,
+                                    batch_size=1)
+        extractors = [models.DataExtractor(field_name="price", output_type="float"),
+                      models.DataExtractor(field_name="empty")]
+        columnar.write_columnar(extractors, records, path, batch_size=1)
+        table = pyarrow.parquet.read_table(path)
+        self.assertEqual(table.schema.field("price").type, pyarrow.float64())
+        self.assertEqual(table.column("price").to_pylist(), [1.0, 2.5, None])
+        # Fields without any value are written as strings.
+        self.assertEqual(table.schema.field("empty").type, pyarrow.string())
+
+    def test_schema_of_first_batch(self):
+        "the first batch fixes the schema, so fields that stay null never hold rows back."
+        path = os.path.join(self.directory, 'out.parquet')
+        extractors = [models.DataExtractor(field_name="id"), models.DataExtractor(field_name="opt")]
+        records = ({"id": index} for index in range(2000))
+        self.assertEqual(columnar.write_columnar(extractors, records, path, batch_size=100), 2000)
+        parquet = pyarrow.parquet.ParquetFile(path)
+        self.assertEqual(parquet.metadata.num_row_groups, 20)
+        self.assertEqual(parquet.schema_arrow.field("opt").type, pyarrow.string())
+        # A value of another type after the first batch raises.
+        with self.assertRaises(ValueError):
+            columnar.write_columnar(self.extractors, make_records(10), path, batch_size=5)
+
+    def test_feather_explicit_schema(self):
+        "declared types override inference and mismatches raise ValueError."
+        path = os.path.join(self.directory, 'out.feather')
+        schema = {"note": pyarrow.int32()}
+        columnar.write_columnar(self.extractors, make_records(7), path, 'feather', batch_size=3,
+                                schema=schema)
+        table = pyarrow.feather.read_table(path)
+        self.assertEqual(table.schema.field("note").type, pyarrow.int32())
+        self.assertEqual(table.column("note").to_pylist(), [None] * 5 + [5, 6])
+        with self.assertRaises(ValueError):
+            columnar.write_columnar(self.extractors, make_records(3), path, 'feather',
+                                    schema={"day": pyarrow.int64()})
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+class TestExtractDataColumnar(TestCase):
+
+    def test_command(self):
+        "extract_data writes Parquet files."
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        Extractor.objects.create(field_name="id")
+        source = os.path.join(directory, 'in.jsonl')
+        with open(source, 'w') as fp:
+            fp.write("\n".join(json.dumps(record) for record in make_records(4)))
+        target = os.path.join(directory, 'out.parquet')
+        call_command('extract_data', 'test_app.Extractor', source, output=target, output_format='parquet')
+        self.assertEqual(pyarrow.parquet.read_table(target).column("id").to_pylist(), [0, 1, 2, 3])
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_dj-data-extractor
+------------
+
+Tests for `dj-data-extractor` engine module.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from collections import OrderedDict
+from django.test import SimpleTestCase
+from dataextractor import engine, models
+from dataextractor.specs import ExtractorSpec
+
+# Seconds allowed for importing the engine and the specs in a new process.
+IMPORT_BUDGET = float(os.environ.get('DATAEXTRACTOR_IMPORT_BUDGET', '0.1'))
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import dataextractor.engine, dataextractor.specs
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    'elapsed': elapsed,
+    'modules': sorted(name for name in sys.modules if name.split('.')[0] in ('django', 'jmespath')),
+}))
+"""
+
+
+class TestEngine(SimpleTestCase):
+
+    def test_import_without_django(self):
+        "the engine imports neither Django nor jmespath and stays within the import budget."
+        env = dict(os.environ)
+        env.pop('DJANGO_SETTINGS_MODULE', None)
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.check_output([sys.executable, '-c', IMPORT_SCRIPT], cwd=root, env=env)
+        result = json.loads(output.decode('utf-8'))
+        self.assertEqual(result['modules'], [])
+        self.assertLess(result['elapsed'], IMPORT_BUDGET)
+
+    def test_same_output_as_models(self):
+        "engine functions extract the same data from specs as the model methods."
+        rows = [
+            {"field_name": "a", "expression": "value1"},
+            {"field_name": "b", "value": "constant"},
+            {"field_name": "c", "expression": "missing", "omit_empty": True},
+            {"field_name": "a", "expression": "format(value2, '{:03d}')"},
+        ]
+        data = {"value1": "text", "value2": 7}
+        extractors = [models.DataExtractor(**row) for row in rows]
+        specs = [ExtractorSpec.from_dict(row) for row in rows]
+        expected = models.DataExtractor.merge_data_extractors(extractors, data)
+        self.assertEqual(expected, OrderedDict([("a", "007"), ("b", "constant")]))
+        self.assertEqual(engine.merge_data_extractors(specs, data), expected)
+        self.assertEqual(engine.extract_many(specs, [data]), [expected])
+        self.assertEqual(engine.search("value1", data), "text")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_dj-data-extractor
+------------
+
+Tests for `dj-data-extractor` expressions module.
+"""
+
+import jmespath
+from django.test import SimpleTestCase
+from dataextractor import expressions
+
+
+class TestExpressionCache(SimpleTestCase):
+
+    def test_hits_and_misses(self):
+        "a second lookup of the same expression text is a hit."
+        cache = expressions.ExpressionCache(maxsize=4)
+        first = cache.get("foo.bar")
+        second = cache.get("foo.bar")
+        self.assertIs(first, second)
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'size': 1, 'maxsize': 4})
+
+    def test_lru_eviction(self):
+        "the least recently used expression is evicted when the cache is full."
+        cache = expressions.ExpressionCache(maxsize=2)
+        cache.get("a")
+        cache.get("b")
+        cache.get("a")
+        cache.get("c")
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_clear(self):
+        "clear removes the entries and resets the counters."
+        cache = expressions.ExpressionCache()
+        cache.get("a")
+        cache.clear()
+        self.assertEqual(cache.stats(), {'hits': 0, 'misses': 0, 'size': 0, 'maxsize': cache.maxsize})
+
+    def test_search_uses_custom_functions(self):
+        "search evaluates expressions with the custom functions."
+        data = {"value": '{"item": "abc"}'}
+        self.assertEqual(expressions.search("value | json(@) | item", data), "abc")
+        self.assertIn("value | json(@) | item", expressions.expression_cache)
+
+
+class TestAccessors(SimpleTestCase):
+
+    corpus = [
+        "foo", "foo.bar", "foo.bar.baz", "foo[0]", "foo[-1]", "foo[5]",
+        "foo.bar[0]", "foo[0].bar", "foo[0][1]", "[0]", "@", '"quoted key".foo',
+    ]
+    records = [
+        {}, {"foo": None}, {"foo": "text"}, {"foo": 1}, {"foo": [1, [2, 3]]},
+        {"foo": {"bar": {"baz": 1}}}, {"foo": {"bar": [{"x": 1}]}},
+        {"foo": [{"bar": False}]}, {"quoted key": {"foo": 0}}, [1, 2], "text", None,
+    ]
+
+    def test_path_steps(self):
+        "only field, subexpression and index nodes are plain paths."
+        self.assertIsNotNone(expressions.path_steps(expressions.compile_expression("foo.bar[0]").parsed))
+        for expression in ["foo[*].bar", "foo[1:2]", "`1`", "foo | bar", "json(@)", "foo || bar"]:
+            parsed = expressions.compile_expression(expression).parsed
+            self.assertIsNone(expressions.path_steps(parsed), expression)
+
+    def test_same_result_as_jmespath(self):
+        "accessors return the same values as the jmespath interpreter."
+        for expression in self.corpus:
+            compiled = expressions.compile_expression(expression)
+            accessor = expressions.make_accessor(expressions.path_steps(compiled.parsed))
+            for record in self.records:
+                self.assertEqual(accessor(record), compiled.search(record), (expression, record))
+
+    def test_compile_evaluator_falls_back_to_interpreter(self):
+        "expressions that are not plain paths are evaluated by the interpreter."
+        evaluator = expressions.compile_evaluator("foo[*].bar")
+        self.assertFalse(hasattr(evaluator, 'path'))
+        self.assertEqual(evaluator({"foo": [{"bar": 1}, {"bar": 2}]}), [1, 2])
+        self.assertTrue(hasattr(expressions.compile_evaluator("foo.bar"), 'path'))
+
+
+class TestValidation(SimpleTestCase):
+
+    def test_check_functions(self):
+        "unknown functions and wrong argument counts are found without evaluating."
+        expressions.validate_expression("foo | date(@, '%Y') | format(@, '{}')")
+        expressions.validate_expression("not_null(a, b, c)")
+        invalid = ["foo |", "nope(@)", "date(@)", "if(a, b)", "not_null()", "length(a, b)"]
+        for expression in invalid:
+            with self.assertRaises(jmespath.exceptions.JMESPathError, msg=expression):
+                expressions.validate_expression(expression)
+
+    def test_preload(self):
+        "stored compiled forms seed the cache unless they are stale."
+        cache = expressions.expression_cache
+        expression = "preloaded.value | [0]"
+        serialized = expressions.dump_compiled(expression)
+        cache.clear()
+        self.assertFalse(expressions.preload("other", serialized))
+        self.assertTrue(expressions.preload(expression, serialized))
+        self.assertFalse(expressions.preload(expression, serialized))
+        self.assertEqual(cache.stats()['misses'], 0)
+        self.assertEqual(expressions.search(expression, {"preloaded": {"value": [3]}}), 3)
+        self.assertEqual(cache.stats()['misses'], 0)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_dj-data-extractor
+------------
+
+Tests for `dj-data-extractor` frames module.
+"""
+
+import datetime
+import unittest
+from django.test import SimpleTestCase
+from dataextractor import frames, models
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestFrames(SimpleTestCase):
+
+    def setUp(self):
+        self.extractors = [
+            models.DataExtractor(field_name="id"),
+            models.DataExtractor(field_name="price"),
+            models.DataExtractor(field_name="flag"),
+            models.DataExtractor(field_name="day", expression="day && date(day, '%Y-%m-%d')"),
+            models.DataExtractor(field_name="tags"),
+            models.DataExtractor(field_name="name"),
+        ]
+        self.records = [
+            {"id": 1, "price": 1, "flag": True, "day": "2020-01-02", "tags": ["a"], "name": "x"},
+            {"id": 2, "price": 2.5, "flag": False, "day": None, "tags": [], "name": None},
+        ]
+
+    def test_arrays(self):
+        "columns get typed arrays when their values allow it."
+        arrays = models.DataExtractor.extract_frame(self.extractors, self.records, frame=False)
+        self.assertEqual(list(arrays), ["id", "price", "flag", "day", "tags", "name"])
+        self.assertEqual(arrays["id"].dtype, numpy.int64)
+        self.assertEqual(arrays["price"].dtype, numpy.float64)
+        self.assertEqual(arrays["flag"].dtype, numpy.bool_)
+        self.assertEqual(arrays["day"].dtype, numpy.dtype('datetime64[D]'))
+        self.assertTrue(numpy.isnat(arrays["day"][1]))
+        self.assertEqual(arrays["tags"].dtype, object)
+        self.assertEqual(arrays["tags"][0], ["a"])
+        self.assertEqual(list(arrays["name"]), ["x", None])
+
+    def test_to_array(self):
+        "None turns integer columns into floats and boolean columns into objects."
+        self.assertTrue(numpy.isnan(frames.to_array([1, None])[1]))
+        self.assertEqual(frames.to_array([True, None]).dtype, object)
+        self.assertEqual(frames.to_array([2 ** 70]).dtype, object)
+        self.assertEqual(frames.to_array([datetime.date(2020, 1, 1)]).dtype, numpy.dtype('datetime64[D]'))
+        self.assertEqual(frames.to_array([datetime.datetime(2020, 1, 1, 3), None]).dtype,
+                         numpy.dtype('datetime64[us]'))
+        self.assertEqual(frames.to_array([None, None]).dtype, object)
+        self.assertEqual(frames.to_array(["1", "2"], dtype='int32').dtype, numpy.int32)
+
+    @unittest.skipIf(pandas is None, "pandas is not installed")
+    def test_frame(self):
+        "plans return DataFrames with a column per field."
+        plan = models.DataExtractor.compile_extractors(self.extractors)
+        frame = plan.extract_frame(self.records, dtypes={"id": "int32"})
+        self.assertEqual(tuple(frame.columns), plan.field_names)
+        self.assertEqual(frame["id"].dtype, numpy.int32)
+        self.assertEqual(frame["price"].tolist(), [1.0, 2.5])
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_dj-data-extractor
+------------
+
+Tests for `dj-data-extractor` functions module.
+"""
+
+import datetime
+import json
+import jmespath
+from collections import OrderedDict
+from django.test import SimpleTestCase, override_settings
+from dataextractor import expressions, functions, models
+from dataextractor.plan import compile_extractors
+
+
+class TestParseDatetime(SimpleTestCase):
+
+    def test_same_result_as_strptime(self):
+        "the ISO fast path parses the same values as strptime."
+        cases = [
+            ("1998-12-23", "%Y-%m-%d"),
+            ("0001-01-01", "%Y-%m-%d"),
+            ("1998-12-23T23:45:54", "%Y-%m-%dT%H:%M:%S"),
+            ("23:45:54", "%H:%M:%S"),
+            ("1998-1-2", "%Y-%m-%d"),
+            ("23/12/1998", "%d/%m/%Y"),
+        ]
+        for value, date_format in cases:
+            self.assertEqual(functions.parse_datetime(value, date_format),
+                datetime.datetime.strptime(value, date_format))
+
+    def test_invalid_values(self):
+        "values rejected by strptime are rejected by the fast path too."
+        cases = [
+            ("1998-13-23", "%Y-%m-%d"),
+            ("19981223", "%Y-%m-%d"),
+            ("1998-12-23 23:45:54", "%Y-%m-%dT%H:%M:%S"),
+            ("1998-12-23", "%Y-%m-%dT%H:%M:%S"),
+            ("24:00:00", "%H:%M:%S"),
+        ]
+        for value, date_format in cases:
+            with self.assertRaises(ValueError):
+                functions.parse_datetime(value, date_format)
+
+    def test_cache_stats(self):
+        "repeated conversions are served from the cache."
+        functions.parse_datetime.cache_clear()
+        functions.parse_datetime("1998-12-23", "%Y-%m-%d")
+        functions.parse_datetime("1998-12-23", "%Y-%m-%d")
+        stats = functions.date_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (1, 1, 1))
+
+
+class TestFormat(SimpleTestCase):
+
+    def test_same_result_as_strftime(self):
+        "compiled and ISO formats give the same text as strftime."
+        utc = datetime.timezone.utc
+        values = [
+            datetime.date(1998, 12, 23),
+            datetime.date(999, 1, 2),
+            datetime.datetime(1998, 12, 23, 23, 45, 54, 123),
+            datetime.datetime(1998, 12, 23, 23, 45, 54, tzinfo=utc),
+            datetime.datetime(12, 1, 2, 3, 4, 5),
+            datetime.time(23, 45, 54, 123),
+        ]
+        formats = ["%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S", "%H:%M:%S", "%d/%m/%Y %z"]
+        for value in values:
+            for fmt in formats:
+                self.assertEqual(functions.format_value(value, fmt), value.strftime(fmt))
+
+    def test_cached_values(self):
+        "equal values of different types or texts are not mixed up."
+        functions._format_cached.cache_clear()
+        self.assertEqual(functions.format_value(1, "{}"), "1")
+        self.assertEqual(functions.format_value(True, "{}"), "True")
+        self.assertEqual(functions.format_value(0.0, "{}"), "0.0")
+        self.assertEqual(functions.format_value(-0.0, "{}"), "-0.0")
+        self.assertEqual(functions.format_value(1, "{}"), "1")
+        stats = functions.format_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+        self.assertEqual(expressions.search("format(value, 'n={:03d}')", {"value": 7}), "n=007")
+
+
+def counting_loads(text):
+    "json decoder counting the decoded strings."
+    counting_loads.calls += 1
+    return json.loads(text)
+
+
+counting_loads.calls = 0
+
+
+class TestJsonFunction(SimpleTestCase):
+
+    def setUp(self):
+        counting_loads.calls = 0
+
+    @override_settings(DATAEXTRACTOR_JSON_DECODER='tests.test_functions.counting_loads')
+    def test_decoder_setting(self):
+        "the decoder is selected with the DATAEXTRACTOR_JSON_DECODER setting."
+        self.assertEqual(expressions.search("value | json(@) | item", {"value": '{"item": 1}'}), 1)
+        self.assertEqual(counting_loads.calls, 1)
+
+    @override_settings(DATAEXTRACTOR_JSON_DECODER='tests.test_functions.counting_loads')
+    def test_decoded_once_per_record(self):
+        "each distinct string is decoded once per record by a plan or merge_data_extractors."
+        extractors = [
+            models.DataExtractor(field_name="a", expression="value | json(@) | a"),
+            models.DataExtractor(field_name="b", expression="value | json(@) | b"),
+            models.DataExtractor(field_name="c", expression="other | json(@)"),
+        ]
+        data = {"value": '{"a": 1, "b": 2}', "other": "3"}
+        output = OrderedDict([['a', 1], ['b', 2], ['c', 3]])
+        self.assertEqual(models.DataExtractor.merge_data_extractors(extractors, data), output)
+        self.assertEqual(counting_loads.calls, 2)
+        plan = compile_extractors(extractors)
+        self.assertEqual(plan.extract_many([data, data], columns=True),
+            OrderedDict([['a', [1, 1]], ['b', [2, 2]], ['c', [3, 3]]]))
+        self.assertEqual(counting_loads.calls, 6)
+
+
+class TestLazyFunctions(SimpleTestCase):
+
+    def setUp(self):
+        self.data = {"flag": True, "value": 1, "text": "not json", "none": None}
+
+    def test_if_evaluates_selected_branch(self):
+        "if() only evaluates the branch it returns."
+        search = expressions.search
+        self.assertEqual(search("if(flag, value, json(text))", self.data), 1)
+        self.assertEqual(search("if(!flag, json(text), value)", self.data), 1)
+        with self.assertRaises(ValueError):
+            search("if(flag, json(text), value)", self.data)
+        with self.assertRaises(jmespath.exceptions.JMESPathTypeError):
+            search("if(value, `1`, `2`)", self.data)
+
+    def test_coalesce_and_default(self):
+        "coalesce() and default() stop at the first non null argument."
+        search = expressions.search
+        self.assertEqual(search("coalesce(none, missing, value, json(text))", self.data), 1)
+        self.assertIsNone(search("coalesce(none, missing)", self.data))
+        self.assertEqual(search("default(value, json(text))", self.data), 1)
+        self.assertEqual(search("default(none, 'x')", self.data), "x")
+        # Without the lazy interpreter every argument is evaluated.
+        eager = jmespath.Options(custom_functions=functions.Functions())
+        self.assertEqual(jmespath.search("coalesce(none, value, `2`)", self.data, eager), 1)
+        self.assertEqual(jmespath.search("default(none, 'x')", self.data, eager), "x")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_dj-data-extractor
+------------
+
+Tests for `dj-data-extractor` instrumentation module.
+"""
+
+from unittest import mock
+from django.test import SimpleTestCase
+from dataextractor import instrumentation, models
+from dataextractor.plan import compile_extractors
+from dataextractor.signals import extractor_measured
+
+
+class TestInstrumentation(SimpleTestCase):
+
+    def setUp(self):
+        self.extractors = [
+            models.DataExtractor(field_name="a", expression="value1"),
+            models.DataExtractor(field_name="b", expression="missing"),
+            models.DataExtractor(field_name="c", expression="empty"),
+            models.DataExtractor(field_name="d", value="constant"),
+            models.DataExtractor(field_name="e", expression="date(value1, '%Y')"),
+        ]
+        self.data = {"value1": "text", "empty": ""}
+
+    def tearDown(self):
+        instrumentation.disable()
+
+    def test_disabled_by_default(self):
+        "nothing is recorded until instrumentation is enabled."
+        self.assertIsNone(instrumentation.recorder)
+        with mock.patch.object(instrumentation.Recorder, 'record') as record:
+            models.DataExtractor.merge_data_extractors(self.extractors[:4], self.data)
+            compile_extractors(self.extractors[:4]).extract(self.data)
+        record.assert_not_called()
+        self.assertEqual(instrumentation.enable().as_dict(), {})
+
+    def test_plan_stats(self):
+        "plans record calls, None and empty values and errors per extractor."
+        plan = compile_extractors(self.extractors)
+        recorder = instrumentation.enable()
+        plan.extract_many([{"value1": "2020"}, {"value1": "2021", "empty": ""}], columns=True)
+        with self.assertRaises(ValueError):
+            plan.extract(self.data)
+        stats = recorder.as_dict()
+        self.assertEqual(sorted(stats), ["a", "b", "c", "e"])
+        self.assertEqual(stats["a"]["calls"], 3)
+        self.assertEqual(stats["b"]["none_rate"], 1.0)
+        self.assertEqual(stats["c"]["empty"], 2)
+        self.assertEqual(stats["e"]["errors"], 1)
+        self.assertGreaterEqual(stats["a"]["max_time"], stats["a"]["mean_time"])
+
+    def test_get_value_and_callback(self):
+        "get_value records its calls and calls the callback."
+        calls = []
+        instrumentation.enable(lambda *args: calls.append(args))
+        models.DataExtractor.merge_data_extractors(self.extractors[:4], self.data)
+        self.assertEqual([call[0] for call in calls], ["a", "b", "c"])
+        self.assertEqual(calls[0][2], "text")
+
+    def test_signal(self):
+        "the send_signal callback sends the extractor_measured signal."
+        received = []
+
+        def receiver(sender, key, **kwargs):
+            received.append(key)
+        extractor_measured.connect(receiver)
+        try:
+            instrumentation.enable(instrumentation.send_signal)
+            compile_extractors(self.extractors[:1]).extract(self.data)
+        finally:
+            extractor_measured.disconnect(receiver)
+        self.assertEqual(received, ["a"])
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_dj-data-extractor
+------------
+
+Tests for `dj-data-extractor` managers module.
+"""
+
+from collections import OrderedDict
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from dataextractor.managers import CompiledExtractorCache, compiled_extractors
+from dataextractor.test_utils.test_app.models import Extractor
+
+
+# Transaction test cases, since plans are invalidated when transactions commit.
+class TestCompiledExtractors(TransactionTestCase):
+
+    def setUp(self):
+        compiled_extractors.clear()
+        cache.clear()
+        self.extractor = Extractor.objects.create(field_name="a", expression="value1")
+        Extractor.objects.create(field_name="b", expression="value2")
+        self.data = {'value1': 1, 'value2': 2}
+
+    def test_compiled_is_cached(self):
+        "the plan is compiled once and served from the cache."
+        plan = Extractor.objects.order_by('pk').compiled()
+        with self.assertNumQueries(0):
+            self.assertIs(Extractor.objects.order_by('pk').compiled(), plan)
+        self.assertEqual(plan.extract(self.data), OrderedDict([['a', 1], ['b', 2]]))
+        self.assertEqual(Extractor.objects.filter(field_name="b").compiled().extract(self.data),
+            OrderedDict([['b', 2]]))
+
+    def test_invalidated_on_save_and_delete(self):
+        "saving or deleting an extractor invalidates the compiled plans."
+        plan = Extractor.objects.order_by('pk').compiled()
+        self.extractor.expression = "value2"
+        self.extractor.save()
+        plan = Extractor.objects.order_by('pk').compiled()
+        self.assertEqual(plan.extract(self.data), OrderedDict([['a', 2], ['b', 2]]))
+        self.extractor.delete()
+        plan = Extractor.objects.order_by('pk').compiled()
+        self.assertEqual(plan.extract(self.data), OrderedDict([['b', 2]]))
+
+    def test_invalidated_on_update(self):
+        "queryset updates invalidate the compiled plans."
+        Extractor.objects.order_by('pk').compiled()
+        Extractor.objects.update(omit=True)
+        self.assertEqual(Extractor.objects.order_by('pk').compiled().extract(self.data), OrderedDict())
+
+    def test_empty_querysets(self):
+        "querysets that cannot match any row compile to an empty plan."
+        self.assertEqual(len(Extractor.objects.none().compiled()), 0)
+        self.assertEqual(Extractor.objects.filter(field_name__in=[]).compiled().extract(self.data),
+                         OrderedDict())
+
+    def test_invalidated_on_commit(self):
+        "changes inside a transaction invalidate the plans when it commits."
+        version = compiled_extractors.get_version(Extractor)
+        with transaction.atomic():
+            Extractor.objects.update(omit=True)
+            self.extractor.save()
+            self.assertEqual(compiled_extractors.get_version(Extractor), version)
+        self.assertNotEqual(compiled_extractors.get_version(Extractor), version)
+        version = compiled_extractors.get_version(Extractor)
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                Extractor.objects.update(omit=False)
+                raise ValueError
+        self.assertEqual(compiled_extractors.get_version(Extractor), version)
+
+    def test_bounded(self):
+        "the least recently used plans are dropped past maxsize."
+        plans = CompiledExtractorCache(maxsize=2)
+        for field_name in ("a", "b", "c"):
+            plans.get(Extractor.objects.filter(field_name=field_name))
+        self.assertEqual(len(plans._plans), 2)
+        with self.assertNumQueries(1):
+            plans.get(Extractor.objects.filter(field_name="a"))
+
+    @override_settings(DATAEXTRACTOR_CACHE='default')
+    def test_shared_cache(self):
+        "with a shared cache other processes reuse the configuration and see new versions."
+        Extractor.objects.order_by('pk').compiled()
+        # Simulate another worker process with an empty local cache.
+        compiled_extractors._plans.clear()
+        with self.assertNumQueries(0):
+            plan = Extractor.objects.order_by('pk').compiled()
+        self.assertEqual(plan.extract(self.data), OrderedDict([['a', 1], ['b', 2]]))
+        version = compiled_extractors.get_version(Extractor)
+        Extractor.objects.create(field_name="c", value="x")
+        self.assertNotEqual(compiled_extractors.get_version(Extractor), version)
+        self.assertEqual(Extractor.objects.order_by('pk').compiled().field_names, ('a', 'b', 'c'))
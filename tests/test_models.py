@@ -9,9 +9,13 @@ Tests for `dj-data-extractor` models module.
 """
 
 import datetime
+import io
 from collections import OrderedDict
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
 from django.test import TestCase
-from dataextractor import models
+from dataextractor import expressions, models
+from dataextractor.test_utils.test_app.models import Extractor
 
 
 class TestDataExtractor(TestCase):
@@ -172,3 +176,43 @@ class TestDataExtractor(TestCase):
 
     def tearDown(self):
         pass
+
+
+class TestExpressionValidation(TestCase):
+
+    def test_clean_and_save(self):
+        "invalid expressions and function calls are rejected by clean and save."
+        for expression in ["foo |", "unknown(@)", "date(@)"]:
+            extractor = Extractor(field_name="a", expression=expression)
+            with self.assertRaises(ValidationError):
+                extractor.full_clean()
+            with self.assertRaises(ValidationError):
+                extractor.save()
+        extractor = Extractor.objects.create(field_name="a", expression="foo | date(@, '%Y')")
+        self.assertIn('"ast"', extractor.compiled_expression)
+        extractor.expression = ""
+        extractor.save()
+        self.assertEqual(extractor.compiled_expression, "")
+
+    def test_compile_uses_stored_form(self):
+        "compiling saved extractors does not parse their expressions again."
+        Extractor.objects.create(field_name="a", expression="stored.a | [0]")
+        Extractor.objects.create(field_name="b", expression="json(stored.b).c")
+        extractors = list(Extractor.objects.order_by('pk'))
+        expressions.expression_cache.clear()
+        expressions.evaluator_cache.clear()
+        plan = Extractor.compile_extractors(extractors)
+        self.assertEqual(expressions.expression_cache.stats()['misses'], 0)
+        self.assertEqual(plan.extract({"stored": {"a": [1], "b": '{"c": 2}'}}), {"a": 1, "b": 2})
+
+    def test_check_command(self):
+        "the check command reports invalid expressions and refreshes stale compiled forms."
+        valid = Extractor.objects.create(field_name="a", expression="foo")
+        Extractor.objects.bulk_create([Extractor(field_name="b", expression="nope(@)")])
+        Extractor.objects.filter(pk=valid.pk).update(expression="bar")
+        stderr = io.StringIO()
+        with self.assertRaises(CommandError):
+            call_command('check_extractors', '--compile', stderr=stderr)
+        self.assertIn("nope()", stderr.getvalue())
+        valid.refresh_from_db()
+        self.assertIn('"bar"', valid.compiled_expression)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_dj-data-extractor
+------------
+
+Tests for `dj-data-extractor` parallel module.
+"""
+
+import datetime
+from django.test import SimpleTestCase
+from dataextractor import models, streaming
+from dataextractor.parallel import ParallelExtractor
+
+
+class TestParallelExtractor(SimpleTestCase):
+
+    def setUp(self):
+        self.extractors = [
+            models.DataExtractor(field_name="id", expression="id"),
+            models.DataExtractor(field_name="date", expression="date | date(@, '%Y-%m-%d')"),
+            models.DataExtractor(field_name="kind", value="constant"),
+        ]
+        self.records = [{"id": index, "date": "1998-12-23"} for index in range(250)]
+        self.expected = models.DataExtractor.extract_many(self.extractors, self.records)
+
+    def test_extract_many(self):
+        "rows come back from the workers in the original order."
+        with ParallelExtractor(self.extractors, workers=2, chunk_size=20) as extractor:
+            self.assertEqual(extractor.extract_many(self.records), self.expected)
+            columns = extractor.extract_many(iter(self.records), columns=True)
+        self.assertEqual(columns['id'], list(range(250)))
+        self.assertEqual(columns['date'], [datetime.date(1998, 12, 23)] * 250)
+
+    def test_small_inputs_run_in_process(self):
+        "inputs smaller than min_records do not start the pool."
+        extractor = ParallelExtractor(self.extractors, workers=2, chunk_size=1000)
+        self.assertEqual(extractor.extract_many(self.records), self.expected)
+        self.assertIsNone(extractor._executor)
+
+    def test_extract_stream(self):
+        "streamed rows keep the input order with a bounded number of pending chunks."
+        rows = streaming.extract_stream(self.extractors, iter(self.records), batch_size=7, workers=2)
+        self.assertEqual(list(rows), self.expected)
+
+    def test_model_extract_many(self):
+        "DataExtractor.extract_many accepts a number of workers."
+        rows = models.DataExtractor.extract_many(self.extractors, self.records, workers=2, chunk_size=10)
+        self.assertEqual(rows, self.expected)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_dj-data-extractor
+------------
+
+Tests for `dj-data-extractor` plan module.
+"""
+
+import itertools
+from collections import OrderedDict
+from unittest import mock
+from django.test import SimpleTestCase
+from dataextractor import models
+from dataextractor.plan import ExtractionPlan, compile_extractors
+
+
+class TestExtractionPlan(SimpleTestCase):
+
+    def test_extract(self):
+        "the plan extracts the same values as merge_data_extractors."
+        extractors = [
+            models.DataExtractor(field_name="value_a", expression="value1"),
+            models.DataExtractor(field_name="value_b", expression="value2"),
+            models.DataExtractor(field_name="value_c", value="constant"),
+            models.DataExtractor(field_name="value1"),
+            models.DataExtractor(field_name="omitted", omit=True),
+        ]
+        data = {'value1': 1, 'value2': 2}
+        plan = compile_extractors(extractors)
+        output = OrderedDict([['value_a', 1], ['value_b', 2], ['value_c', 'constant'], ['value1', 1]])
+        self.assertEqual(plan.extract(data), output)
+        self.assertEqual(plan.field_names, ('value_a', 'value_b', 'value_c', 'value1'))
+
+    def test_override(self):
+        "the last extractor of a field wins and keeps the position of the first one."
+        extractors = [
+            models.DataExtractor(field_name="value_b", expression="value2"),
+            models.DataExtractor(field_name="value_a", expression="value1"),
+            models.DataExtractor(field_name="value_b", expression="value1"),
+        ]
+        plan = compile_extractors(extractors)
+        self.assertEqual(plan.extract({'value1': 1, 'value2': 2}),
+            OrderedDict([['value_b', 1], ['value_a', 1]]))
+
+    def test_immutable(self):
+        "plans cannot be modified."
+        plan = compile_extractors([])
+        with self.assertRaises(AttributeError):
+            plan._fields = ()
+
+    def test_same_output_as_merge_data_extractors(self):
+        "combinations of omit, value, expression, output_type and omit_empty give the same output."
+        rows = [
+            dict(field_name="a", expression="x"),
+            dict(field_name="a", expression="y", omit_empty=True),
+            dict(field_name="b", expression="y", omit_empty=True),
+            dict(field_name="a", value="constant"),
+            dict(field_name="b", expression="x"),
+            dict(field_name="a", omit=True, expression="x"),
+            dict(field_name="c", expression="missing", omit_empty=True),
+            dict(field_name="x"),
+            dict(field_name="b", value="null", output_type="json", omit_empty=True),
+        ]
+        records = [{}, {'x': 1}, {'y': 2}, {'x': 1, 'y': 2}, {'x': None, 'y': 0}]
+        for size in range(1, 5):
+            for combination in itertools.permutations(rows, size):
+                extractors = [models.DataExtractor(**row) for row in combination]
+                plan = compile_extractors(extractors)
+                for record in records:
+                    self.assertEqual(
+                        list(plan.extract(record).items()),
+                        list(models.DataExtractor.merge_data_extractors(extractors, record).items()))
+
+    def test_extract_many(self):
+        "extract_many returns a row per record."
+        extractors = [
+            models.DataExtractor(field_name="a", expression="foo.bar"),
+            models.DataExtractor(field_name="b", value="constant"),
+        ]
+        records = [{'foo': {'bar': 1}}, {'foo': 'text'}, {}]
+        rows = models.DataExtractor.extract_many(extractors, records)
+        self.assertEqual(rows, [
+            OrderedDict([['a', 1], ['b', 'constant']]),
+            OrderedDict([['a', None], ['b', 'constant']]),
+            OrderedDict([['a', None], ['b', 'constant']]),
+        ])
+
+    def test_extract_many_columns(self):
+        "in columns mode each field gets the list of its values."
+        extractors = [
+            models.DataExtractor(field_name="a", expression="foo.bar"),
+            models.DataExtractor(field_name="b", expression="foo.bar[0]"),
+            models.DataExtractor(field_name="c", expression="x", omit_empty=True),
+        ]
+        records = iter([{'foo': {'bar': [1]}, 'x': 1}, {'foo': [1]}])
+        columns = models.DataExtractor.extract_many(extractors, records, columns=True)
+        self.assertEqual(columns, OrderedDict([
+            ['a', [[1], None]], ['b', [1, None]], ['c', [1, None]]]))
+
+    def test_columns_without_rows(self):
+        "plans with json() or omit_empty fill the columns without building rows."
+        extractors = [
+            models.DataExtractor(field_name="a", expression="x", omit_empty=True),
+            models.DataExtractor(field_name="a", expression="y"),
+            models.DataExtractor(field_name="b", expression="json(doc).value"),
+            models.DataExtractor(field_name="c", value="constant"),
+        ]
+        plan = compile_extractors(extractors)
+        records = [{'x': 1, 'doc': '{"value": 2}'}, {'y': 3, 'doc': '{}'}, {'doc': '[]'}]
+        expected = [plan.extract(data) for data in records]
+        with mock.patch.object(ExtractionPlan, 'extract', side_effect=AssertionError):
+            columns = plan.extract_many(records, columns=True)
+        self.assertEqual(columns, OrderedDict(
+            (name, [row.get(name) for row in expected]) for name in plan.field_names))
+
+    def test_extract_many_preallocated(self):
+        "preallocated outputs are overwritten in place and grow when needed."
+        plan = compile_extractors([models.DataExtractor(field_name="a", expression="a")])
+        rows = [None]
+        self.assertIs(plan.extract_many([{'a': 1}, {'a': 2}], out=rows), rows)
+        self.assertEqual(rows, [OrderedDict([['a', 1]]), OrderedDict([['a', 2]])])
+        columns = {'a': [None, None, None]}
+        plan.extract_many([{'a': 1}], columns=True, out=columns)
+        self.assertEqual(columns, {'a': [1, None, None]})
+
+
+class TestSharedPaths(SimpleTestCase):
+
+    expressions = [
+        "order.customer.address.city",
+        "order.customer.address.zip",
+        "order.customer.name",
+        "order.items[0].sku",
+        "order.items[-1].sku",
+        "order.customer.address.city | not_null(@, 'none')",
+        "order.customer | type(@) | [@, 'type']",
+        "order.customer.name || 'unknown'",
+        "order",
+        "@",
+        "missing.path",
+    ]
+    records = [
+        {},
+        {"order": None},
+        {"order": "text"},
+        {"order": {"customer": {"name": "Ann", "address": {"city": "Lisbon", "zip": "1000"}},
+                   "items": [{"sku": "a"}, {"sku": "b"}]}},
+        {"order": {"customer": {"address": []}, "items": {}}},
+    ]
+
+    def test_prefixes_are_shared(self):
+        "plans with shared prefixes evaluate them once per record."
+        extractors = [models.DataExtractor(field_name=str(index), expression=expression)
+                      for index, expression in enumerate(self.expressions[:3])]
+        plan = compile_extractors(extractors)
+        self.assertIsNotNone(plan._prefetch)
+        self.assertEqual(plan._prefetch.lookups, 6)
+
+    def test_same_output_as_merge_data_extractors(self):
+        "shared prefix evaluation gives the same output as independent evaluation."
+        extractors = [models.DataExtractor(field_name="f%d" % (index % 7), expression=expression,
+                                           omit_empty=bool(index % 3))
+                      for index, expression in enumerate(self.expressions)]
+        plan = compile_extractors(extractors)
+        self.assertIsNotNone(plan._prefetch)
+        for record in self.records:
+            self.assertEqual(list(plan.extract(record).items()),
+                list(models.DataExtractor.merge_data_extractors(extractors, record).items()))
+        extractors = [models.DataExtractor(field_name=str(index), expression=expression)
+                      for index, expression in enumerate(self.expressions)]
+        columns = compile_extractors(extractors).extract_many(self.records, columns=True)
+        for index, record in enumerate(self.records):
+            row = models.DataExtractor.merge_data_extractors(extractors, record)
+            self.assertEqual([column[index] for column in columns.values()], list(row.values()))
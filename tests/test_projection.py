@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_dj-data-extractor
+------------
+
+Tests for `dj-data-extractor` projection module.
+"""
+
+import io
+import json
+from django.test import SimpleTestCase
+from dataextractor import expressions, models, streaming
+from dataextractor.projection import ANY, Projection, compile_projection, expression_paths, \
+    format_path, input_paths
+from dataextractor.specs import ExtractorSpec
+from tests.corpus import CORPUS, PAYLOADS, evaluate
+
+
+class TestInputPaths(SimpleTestCase):
+
+    def test_paths(self):
+        "paths read by expressions and plain fields, without redundant ones."
+        extractors = [
+            ExtractorSpec("id"),
+            ExtractorSpec("name", expression="customer.name"),
+            ExtractorSpec("skus", expression="items[*].sku"),
+            ExtractorSpec("all", expression="items[0]"),
+            ExtractorSpec("constant", value="x"),
+            ExtractorSpec("omitted", expression="secret", omit=True),
+        ]
+        self.assertEqual(input_paths(extractors),
+                         {("id",), ("customer", "name"), ("items", ANY)})
+        self.assertEqual(expression_paths("a[?b == `1`].c || @"), {(), ("a", ANY, "b"), ("a", ANY, "c")})
+        self.assertEqual(format_path(("items", ANY, "sku")), "items[*].sku")
+        self.assertEqual(format_path(("a b",)), '"a b"')
+        self.assertEqual(format_path(()), "@")
+
+    def test_same_result_on_pruned_documents(self):
+        "expressions give the same values and errors on reduced documents."
+        for expression in CORPUS:
+            projection = Projection(expression_paths(expression))
+            evaluator = expressions.compile_evaluator(expression)
+            for payload in PAYLOADS:
+                pruned = projection.prune(payload)
+                self.assertEqual(evaluate(evaluator, pruned), evaluate(evaluator, payload),
+                                 (expression, payload, pruned))
+                self.assertEqual(projection.loads(json.dumps(payload)), pruned, (expression, payload))
+
+
+class TestProjection(SimpleTestCase):
+
+    def test_prune_and_loads(self):
+        "unread values are dropped and documents still merge the same."
+        extractors = [
+            models.DataExtractor(field_name="id"),
+            models.DataExtractor(field_name="skus", expression="items[*].sku"),
+        ]
+        document = {"id": 1, "blob": "x" * 100, "items": [{"sku": "a", "meta": {"w": [1]}}], "n": {}}
+        projection = compile_projection(extractors)
+        expected = {"id": 1, "items": [{"sku": "a"}]}
+        self.assertEqual(projection.prune(document), expected)
+        self.assertEqual(projection.loads(json.dumps(document, indent=2).encode('utf-8')), expected)
+        self.assertEqual(models.DataExtractor.merge_data_extractors(extractors, expected),
+                         models.DataExtractor.merge_data_extractors(extractors, document))
+        lines = io.StringIO(json.dumps(document) + "\n")
+        self.assertEqual(list(streaming.iter_records(lines, projection=projection)), [expected])
+        array = json.dumps([document, 7, document])
+        for chunk_size in (1, 7, 64, 4096):
+            records = streaming.iter_json_array(io.StringIO(array), chunk_size, projection=projection)
+            self.assertEqual(list(records), [expected, 7, expected])
+
+    def test_invalid_json(self):
+        "invalid or truncated documents raise ValueError."
+        projection = Projection([("a",)])
+        for text in ('{"a": 1', '{"a" 1}', '{"a": 1} x', '{"b": [1, }', '{"a": 1,}'):
+            with self.assertRaises(ValueError):
+                projection.loads(text)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_dj-data-extractor
+------------
+
+Tests for `dj-data-extractor` resultcache module.
+"""
+
+from unittest import mock
+import jmespath
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+from dataextractor import expressions, models
+from dataextractor.resultcache import CachedPlan, ResultCache, content_hash, fingerprint
+from dataextractor.specs import ExtractorSpec
+
+
+class Clock(object):
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResultCache(SimpleTestCase):
+
+    def setUp(self):
+        self.specs = [ExtractorSpec("a", expression="value1"), ExtractorSpec("b", value="constant")]
+        self.data = {"value1": 1, "value2": [1, 2]}
+
+    def test_same_result_as_merge(self):
+        "repeated payloads return the stored result."
+        plan = CachedPlan(self.specs)
+        expected = models.DataExtractor.merge_data_extractors(self.specs, self.data)
+        self.assertEqual(plan.extract(self.data), expected)
+        self.assertEqual(plan.extract(dict(self.data)), expected)
+        self.assertEqual(plan.extract({"value1": 2}), {"a": 2, "b": "constant"})
+        stats = plan.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (1, 2, 2))
+        self.assertAlmostEqual(stats['hit_ratio'], 1 / 3)
+
+    def test_keys(self):
+        "keys change with the content, its key order and the configuration."
+        self.assertEqual(content_hash({"a": 1}), content_hash({"a": 1}))
+        self.assertNotEqual(content_hash({"a": 1}), content_hash({"a": True}))
+        self.assertNotEqual(content_hash({"a": 0.0}), content_hash({"a": -0.0}))
+        self.assertNotEqual(content_hash({"a": 1, "b": 2}), content_hash({"b": 2, "a": 1}))
+        self.assertNotEqual(fingerprint(self.specs), fingerprint(self.specs[:1]))
+        current = fingerprint(self.specs)
+        with mock.patch.object(jmespath, '__version__', '0.0.0'):
+            self.assertNotEqual(fingerprint(self.specs), current)
+        with override_settings(DATAEXTRACTOR_BACKEND='closures'):
+            self.assertNotEqual(fingerprint(self.specs), current)
+        expressions.reset_backend()
+        self.assertEqual(fingerprint(self.specs), current)
+        cache = ResultCache()
+        CachedPlan(self.specs, cache).extract(self.data)
+        self.assertEqual(CachedPlan(self.specs[:1], cache).extract(self.data), {"a": 1})
+
+    def test_type_tagged_keys(self):
+        "records equal in JSON but not in Python do not share results."
+        plan = CachedPlan([ExtractorSpec("a", expression="a[0]"), ExtractorSpec("1")])
+        self.assertEqual(plan.extract({"a": (5,), 1: "v"}), {"a": None, "1": None})
+        self.assertEqual(plan.extract({"a": [5], "1": "v"}), {"a": 5, "1": "v"})
+        self.assertNotEqual(content_hash({1: "v"}), content_hash({"1": "v"}))
+        self.assertNotEqual(content_hash((1,)), content_hash([1]))
+
+    def test_read_parts_and_caller_keys(self):
+        "records are keyed on the parts read, or on the key given by the caller."
+        plan = CachedPlan(self.specs)
+        plan.extract({"value1": 1, "unread": [1]})
+        self.assertEqual(plan.extract({"value1": 1, "unread": [2]}), {"a": 1, "b": "constant"})
+        self.assertEqual(plan.extract({"value1": 2}, key="delivery-1"), {"a": 2, "b": "constant"})
+        self.assertEqual(plan.extract({}, key="delivery-1"), {"a": 2, "b": "constant"})
+        self.assertEqual(plan.extract_many([{"value1": 3}], keys=["delivery-2"]),
+                         [{"a": 3, "b": "constant"}])
+        self.assertEqual(plan.cache.stats()['hits'], 2)
+
+    def test_eviction(self):
+        "results are evicted past maxsize and after ttl seconds."
+        clock = Clock()
+        cache = ResultCache(maxsize=2, ttl=10, timer=clock)
+        for key in ("a", "b", "c"):
+            cache.set(key, {key: 1})
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), {"b": 1})
+        clock.now = 11
+        self.assertIsNone(cache.get("c"))
+        self.assertEqual(cache.stats()['size'], 1)
+
+    def test_shared_cache(self):
+        "results are shared through a Django cache."
+        caches['default'].clear()
+        CachedPlan(self.specs, ResultCache(alias='default')).extract(self.data)
+        other = CachedPlan(self.specs, ResultCache(alias='default'))
+        self.assertEqual(other.extract(self.data), {"a": 1, "b": "constant"})
+        self.assertEqual(other.cache.stats()['shared_hits'], 1)
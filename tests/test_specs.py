@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_dj-data-extractor
+------------
+
+Tests for `dj-data-extractor` specs module.
+"""
+
+import io
+import pickle
+from collections import OrderedDict
+from django.test import SimpleTestCase
+from dataextractor import models
+from dataextractor.plan import compile_extractors
+from dataextractor.specs import ExtractorSpec, dump_specs, load_specs, to_specs
+
+
+class TestExtractorSpec(SimpleTestCase):
+
+    def setUp(self):
+        self.rows = [
+            {"field_name": "a", "expression": "value1"},
+            {"field_name": "b", "value": "constant"},
+            {"field_name": "c", "expression": "missing", "omit_empty": True},
+            {"field_name": "d", "omit": True},
+            {"field_name": "e", "expression": "nested.value"},
+        ]
+        self.data = {"value1": "text", "d": 1, "nested": {"value": 2}}
+
+    def test_compact(self):
+        "specs are tuples without an instance dict."
+        spec = ExtractorSpec("a", expression="value1")
+        self.assertFalse(hasattr(spec, '__dict__'))
+        self.assertEqual(spec, ("a", False, '', "value1", False, ''))
+        self.assertEqual(pickle.loads(pickle.dumps(spec)), spec)
+
+    def test_from_model(self):
+        "model instances convert into equal specs."
+        extractors = [models.DataExtractor(**row) for row in self.rows]
+        self.assertEqual(
+            [extractor.to_spec() for extractor in extractors],
+            [ExtractorSpec.from_dict(row) for row in self.rows])
+
+    def test_same_output(self):
+        "specs extract the same data as model instances."
+        extractors = [models.DataExtractor(**row) for row in self.rows]
+        specs = to_specs(self.rows)
+        expected = OrderedDict([("a", "text"), ("b", "constant"), ("e", 2)])
+        self.assertEqual(models.DataExtractor.merge_data_extractors(extractors, self.data), expected)
+        self.assertEqual(models.DataExtractor.merge_data_extractors(specs, self.data), expected)
+        self.assertEqual(compile_extractors(specs).extract(self.data), expected)
+        self.assertEqual(models.DataExtractor.extract_many(specs, [self.data]), [expected])
+
+    def test_json(self):
+        "specs round trip through JSON strings and files."
+        specs = to_specs(self.rows)
+        document = dump_specs(specs)
+        self.assertEqual(load_specs(document), specs)
+        self.assertEqual(load_specs(io.StringIO(document)), specs)
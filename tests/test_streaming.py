@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_dj-data-extractor
+------------
+
+Tests for `dj-data-extractor` streaming module and extract_data command.
+"""
+
+import datetime
+import io
+import json
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+from dataextractor import models, streaming
+from dataextractor.projection import Projection
+from dataextractor.test_utils.test_app.models import Extractor
+
+
+RECORDS = [
+    {"id": 1, "price": 1.5, "tags": ["a", "b"], "text": "x,]\"y"},
+    {"id": 2, "price": -2.5e-3, "tags": [], "nested": {"id": 3}},
+    {"id": 12345678901234567890, "price": None},
+]
+
+
+class TestReaders(SimpleTestCase):
+
+    def test_json_array_in_small_chunks(self):
+        "array items are decoded correctly whatever the chunk boundaries."
+        for indent in (None, 2):
+            text = json.dumps(RECORDS, indent=indent)
+            for chunk_size in (1, 2, 3, 5, 64):
+                records = streaming.iter_json_array(io.StringIO(text), chunk_size=chunk_size)
+                self.assertEqual(list(records), RECORDS)
+
+    def test_truncated_json_array(self):
+        "a truncated array raises ValueError."
+        with self.assertRaises(ValueError):
+            list(streaming.iter_json_array(io.StringIO('[1, 2'), chunk_size=2))
+
+    def test_malformed_json_array(self):
+        "a malformed item raises at once, with its position in the file."
+        text = '[1, tru, ' + ', '.join(['{"a": 1}'] * 10000) + ']'
+        source = io.StringIO(text)
+        with self.assertRaisesMessage(ValueError, "Expecting value at position 4"):
+            list(streaming.iter_json_array(source, chunk_size=64))
+        self.assertLessEqual(source.tell(), 128)
+        text = '[' + ', '.join(['{"a": 1}'] * 100) + ', {"a" 1}]'
+        for chunk_size in (1, 64, 4096):
+            with self.assertRaisesMessage(ValueError, "delimiter at position %d" % text.index('1}]')):
+                list(streaming.iter_json_array(io.StringIO(text), chunk_size=chunk_size))
+        projection = Projection([("a",)])
+        with self.assertRaisesMessage(ValueError, "delimiter at position %d" % text.index('1}]')):
+            list(streaming.iter_json_array(io.StringIO(text), chunk_size=64, projection=projection))
+
+    def test_auto_format(self):
+        "the format is detected from the first non blank character."
+        lines = "\n".join(json.dumps(record) for record in RECORDS)
+        self.assertEqual(list(streaming.iter_records(io.StringIO(lines))), RECORDS)
+        array = "\n  " + json.dumps(RECORDS)
+        self.assertEqual(list(streaming.iter_records(io.StringIO(array))), RECORDS)
+        self.assertEqual(list(streaming.iter_records(io.StringIO(""))), [])
+
+    def test_extract_stream(self):
+        "extract_stream yields a row per record."
+        extractors = [models.DataExtractor(field_name="id", expression="nested.id")]
+        rows = streaming.extract_stream(extractors, iter(RECORDS), batch_size=2)
+        self.assertEqual([row['id'] for row in rows], [None, 3, None])
+
+
+class TestWriters(SimpleTestCase):
+
+    def test_json_lines_writer(self):
+        "dates are written in ISO format."
+        output = io.StringIO()
+        rows = [OrderedDict([['date', datetime.date(1998, 12, 23)]])]
+        self.assertEqual(streaming.write_stream(streaming.JSONLinesWriter(output), rows), 1)
+        self.assertEqual(output.getvalue(), '{"date": "1998-12-23"}\n')
+
+    def test_csv_writer(self):
+        "None is written as an empty cell and lists as JSON."
+        output = io.StringIO()
+        writer = streaming.CSVWriter(output, ['a', 'b'])
+        streaming.write_stream(writer, [{'a': None, 'b': [1, 2]}])
+        self.assertEqual(output.getvalue(), 'a,b\r\n,"[1, 2]"\r\n')
+
+
+class TestExtractDataCommand(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.input = os.path.join(self.directory, 'input.json')
+        with open(self.input, 'w') as fp:
+            json.dump(RECORDS, fp)
+        Extractor.objects.create(field_name="id")
+        Extractor.objects.create(field_name="first_tag", expression="tags[0]")
+
+    def test_jsonl_output(self):
+        output = os.path.join(self.directory, 'output.jsonl')
+        call_command('extract_data', 'test_app.Extractor', self.input, output=output, batch_size=2)
+        with open(output) as fp:
+            rows = [json.loads(line) for line in fp]
+        self.assertEqual(rows, [
+            {'id': 1, 'first_tag': 'a'},
+            {'id': 2, 'first_tag': None},
+            {'id': 12345678901234567890, 'first_tag': None},
+        ])
+
+    def test_invalid_batch_size(self):
+        "batch sizes below 1 are rejected instead of writing nothing."
+        output = os.path.join(self.directory, 'output.jsonl')
+        for batch_size in (0, -1):
+            with self.assertRaisesMessage(CommandError, "--batch-size must be at least 1."):
+                call_command('extract_data', 'test_app.Extractor', self.input, output=output,
+                             batch_size=batch_size)
+        self.assertFalse(os.path.exists(output))
+
+    def test_pruned_input(self):
+        "--prune extracts the same rows from reduced records."
+        stdout = io.StringIO()
+        call_command('extract_data', 'test_app.Extractor', self.input, output_format='csv',
+                     prune=True, stdout=stdout)
+        self.assertEqual(stdout.getvalue().splitlines(),
+            ['id,first_tag', '1,a', '2,', '12345678901234567890,'])
+
+    def test_csv_output(self):
+        stdout = io.StringIO()
+        call_command('extract_data', 'test_app.Extractor', self.input, output_format='csv', stdout=stdout)
+        self.assertEqual(stdout.getvalue().splitlines(),
+            ['id,first_tag', '1,a', '2,', '12345678901234567890,'])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)